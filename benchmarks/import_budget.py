@@ -0,0 +1,111 @@
+"""
+Import-time budget check for the flag-only CLI paths.
+
+Each path is run in a fresh interpreter under `python -X importtime`, the
+per-module report on stderr is parsed, and the check fails (exit code 1) when
+the cumulative import time crosses the budget or when a heavy subsystem that
+the path has no use for gets imported.
+
+Usage:
+    python benchmarks/import_budget.py [--budget-ms 150] [--runs 5] [--json]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must never be imported just to print or write a setting.
+FORBIDDEN_MODULES = ["textual", "litellm", "pynput", "openai", "tokenizers", "huggingface_hub"]
+
+# Flag-only paths. None of them modify config.json or .env: the unknown model id
+# is rejected before anything is written, and the key path only imports the
+# modules `--openai KEY` would load.
+FLAG_PATHS: Dict[str, str] = {
+    "--models": "from tAI.main import tAI; import sys; sys.argv = ['tai', '--models']; tAI()",
+    "--default-model": "from tAI.main import tAI; import sys; sys.argv = ['tai', '--default-model', 'budget/check']; tAI()",
+    "--help": "from tAI.main import tAI; import sys; sys.argv = ['tai', '--help']\ntry:\n    tAI()\nexcept SystemExit:\n    pass",
+    "api key flags": "import tAI.main; import tAI.Utils.api_key_manager",
+}
+
+
+def parse_importtime(stderr: str) -> Dict[str, int]:
+    """
+    Parses `-X importtime` output into a mapping of module -> cumulative microseconds.
+
+    Args:
+        stderr (str): The stderr of an interpreter started with `-X importtime`.
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative_us, name = line.split("|")
+        modules[name.strip()] = int(cumulative_us)
+    return modules
+
+
+def top_level_total(stderr: str) -> int:
+    """Sums the cumulative time of top-level imports, i.e. the whole import cost in microseconds."""
+    total = 0
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative_us, name = line.split("|")
+        # Nested imports are indented by two spaces per level after the separator.
+        if not name.startswith("   "):
+            total += int(cumulative_us)
+    return total
+
+
+def measure(code: str, runs: int) -> Dict[str, object]:
+    """Runs `code` `runs` times and keeps the fastest run to filter out disk-cache noise."""
+    best = None
+    imported: List[str] = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"Flag path failed:\n{result.stderr[-2000:]}")
+        total = top_level_total(result.stderr)
+        if best is None or total < best:
+            best = total
+            imported = list(parse_importtime(result.stderr))
+    forbidden = sorted({m.split(".")[0] for m in imported if m.split(".")[0] in FORBIDDEN_MODULES})
+    return {"import_ms": round(best / 1000, 2), "forbidden": forbidden}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Import-time budget check for flag-only CLI paths")
+    parser.add_argument("--budget-ms", type=float, default=150.0, help="Maximum cumulative import time per path")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per path; the fastest one is reported")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    results = {}
+    failed = False
+    for path, code in FLAG_PATHS.items():
+        result = measure(code, args.runs)
+        result["ok"] = result["import_ms"] <= args.budget_ms and not result["forbidden"]
+        failed = failed or not result["ok"]
+        results[path] = result
+
+    if args.json:
+        print(json.dumps({"budget_ms": args.budget_ms, "paths": results}, indent=2))
+    else:
+        for path, result in results.items():
+            mark = "✅" if result["ok"] else "❌"
+            extra = f" (imports {', '.join(result['forbidden'])})" if result["forbidden"] else ""
+            print(f"{mark} {path}: {result['import_ms']} ms / {args.budget_ms} ms{extra}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
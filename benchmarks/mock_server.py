@@ -0,0 +1,250 @@
+"""
+A local OpenAI-compatible stand-in for benchmarking tAI without network or API keys.
+
+It answers POST /v1/chat/completions (streaming and non-streaming) with a
+`{"command": ...}` payload after a configurable latency, and can inject jitter
+and error responses (e.g. 429) at a given rate. POST /v1/messages answers in
+the format of Anthropic's Messages API, with a `command` tool call if the
+request forces one.
+
+Usage:
+    python benchmarks/mock_server.py --port 8765 --latency 0.2 --jitter 0.05
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+@dataclass
+class MockConfig:
+    # Seconds before the first byte of the response.
+    latency: float = 0.0
+    # Uniform random extra latency in seconds, added on top of `latency`.
+    jitter: float = 0.0
+    # Characters per streamed chunk and the delay between chunks.
+    chunk_size: int = 4
+    chunk_delay: float = 0.0
+    # Fraction of requests answered with `error_status` instead of a completion.
+    error_rate: float = 0.0
+    error_status: int = 429
+    command: str = "find . -type f -size +100M -print0 | xargs -0 ls -lh"
+    # Extra tokens sent after the JSON object, which a streaming client shouldn't wait for.
+    trailing_text: str = ""
+    # How the command is wrapped: "json" (as requested), "fenced" (JSON in a markdown
+    # code fence) or "text" (the bare command, ignoring the schema).
+    reply_format: str = "json"
+    # Answer requests that carry `response_format` with a 400, like providers without structured output.
+    reject_response_format: bool = False
+    seed: int = 0
+
+
+class MockServer:
+    """Runs the stand-in server on a background thread."""
+
+    def __init__(self, config: MockConfig = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or MockConfig()
+        self.random = random.Random(self.config.seed)
+        self.requests = 0
+        self.closed_early = 0
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "MockServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "MockServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes; without TCP_NODELAY the body waits
+            # for the client's delayed ACK, adding ~40 ms to every response.
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, status: int, payload: dict) -> None:
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _write_chunk(self, data: bytes) -> None:
+                self.wfile.write(b"%x\r\n" % len(data) + data + b"\r\n")
+                self.wfile.flush()
+
+            def do_GET(self):
+                if self.path.rstrip("/").endswith("/models"):
+                    self._send_json(200, {"object": "list", "data": [{"id": "bench", "object": "model"}]})
+                else:
+                    self._send_json(404, {"error": {"message": "not found"}})
+
+            def do_POST(self):
+                config = server.config
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                with server._lock:
+                    server.requests += 1
+                    delay = config.latency + server.random.uniform(0, config.jitter)
+                    fail = server.random.random() < config.error_rate
+                time.sleep(delay)
+
+                if fail:
+                    self._send_json(config.error_status, {"error": {"message": "Injected error", "type": "rate_limit_error", "code": config.error_status}})
+                    return
+
+                if config.reject_response_format and request.get("response_format"):
+                    self._send_json(400, {"error": {"message": "response_format is not supported by this model", "type": "invalid_request_error", "code": 400}})
+                    return
+
+                content = json.dumps({"command": config.command})
+                if config.reply_format == "fenced":
+                    content = f"```json\n{content}\n```"
+                elif config.reply_format == "text":
+                    content = config.command
+                content += config.trailing_text
+                model = request.get("model", "bench")
+                if self.path.rstrip("/").endswith("/messages"):
+                    self._send_messages(request, content, model)
+                    return
+                if not request.get("stream"):
+                    self._send_json(200, {
+                        "id": "chatcmpl-bench",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": model,
+                        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                        "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+                    })
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                try:
+                    for start in range(0, len(content), config.chunk_size):
+                        chunk = {
+                            "id": "chatcmpl-bench",
+                            "object": "chat.completion.chunk",
+                            "created": int(time.time()),
+                            "model": model,
+                            "choices": [{"index": 0, "delta": {"content": content[start:start + config.chunk_size]}, "finish_reason": None}],
+                        }
+                        self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode())
+                        if config.chunk_delay:
+                            time.sleep(config.chunk_delay)
+                    self._write_chunk(b"data: [DONE]\n\n")
+                    self.wfile.write(b"0\r\n\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    with server._lock:
+                        server.closed_early += 1
+
+            def _send_messages(self, request: dict, content: str, model: str) -> None:
+                """Answers like Anthropic's Messages API; a forced tool call carries the command object."""
+                config = server.config
+                tool = request.get("tool_choice", {}).get("type") == "tool" and config.reply_format == "json"
+                if tool:
+                    block = {"type": "tool_use", "id": "toolu_bench", "name": "command", "input": {"command": config.command}}
+                    delta_type, delta_key = "input_json_delta", "partial_json"
+                    content = json.dumps(block["input"])
+                    empty = dict(block, input={})
+                else:
+                    block = {"type": "text", "text": content}
+                    delta_type, delta_key = "text_delta", "text"
+                    empty = {"type": "text", "text": ""}
+                if not request.get("stream"):
+                    self._send_json(200, {
+                        "id": "msg_bench",
+                        "type": "message",
+                        "role": "assistant",
+                        "model": model,
+                        "content": [block],
+                        "stop_reason": "tool_use" if tool else "end_turn",
+                        "usage": {"input_tokens": 1, "output_tokens": 1},
+                    })
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+
+                def event(name: str, data: dict) -> None:
+                    self._write_chunk(f"event: {name}\ndata: {json.dumps(dict(data, type=name))}\n\n".encode())
+
+                try:
+                    event("message_start", {"message": {"id": "msg_bench", "type": "message", "role": "assistant", "model": model, "content": []}})
+                    event("content_block_start", {"index": 0, "content_block": empty})
+                    for start in range(0, len(content), config.chunk_size):
+                        event("content_block_delta", {"index": 0, "delta": {"type": delta_type, delta_key: content[start:start + config.chunk_size]}})
+                        if config.chunk_delay:
+                            time.sleep(config.chunk_delay)
+                    event("content_block_stop", {"index": 0})
+                    event("message_stop", {})
+                    self.wfile.write(b"0\r\n\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    with server._lock:
+                        server.closed_early += 1
+
+        return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stand-in server for tAI benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--chunk-size", type=int, default=4)
+    parser.add_argument("--chunk-delay", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=429)
+    parser.add_argument("--reply-format", choices=["json", "fenced", "text"], default="json")
+    parser.add_argument("--reject-response-format", action="store_true")
+    args = parser.parse_args()
+
+    config = MockConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        chunk_size=args.chunk_size,
+        chunk_delay=args.chunk_delay,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        reply_format=args.reply_format,
+        reject_response_format=args.reject_response_format,
+    )
+    server = MockServer(config, args.host, args.port)
+    print(f"Mock LLM server listening on {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,360 @@
+"""
+Offline end-to-end latency benchmarks for tAI.
+
+Every scenario runs against benchmarks/mock_server.py and drives the Textual
+app headlessly through its pilot API, so no network access or API keys are
+needed. Results are written as JSON and can be compared with an earlier run:
+
+    python benchmarks/run.py --output results.json
+    python benchmarks/run.py --compare results.json --threshold 0.2
+
+Scenarios:
+    cold_start          process start until #input has focus
+    first_keystroke     process start until a key typed at launch shows up in #input
+    submit_to_response  Enter until the final command is in #response
+    json_decode         parsing a completion / a streamed payload
+    backend_import      importing and creating each LLM backend: seconds and peak RSS
+    execute_throughput  execute-mode output lines per second
+    paste               Automate.paste_command_to_terminal with a fake keyboard
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_server import MockConfig, MockServer  # noqa: E402
+
+MODEL = "openai/bench"
+# Seconds a scenario may wait for one result before it is failed instead of hanging.
+SCENARIO_TIMEOUT = 60
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Returns p50/p95/min/max in milliseconds for samples in seconds."""
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    return {
+        "p50_ms": round(statistics.median(ordered) * 1000, 3),
+        "p95_ms": round(p95 * 1000, 3),
+        "min_ms": round(ordered[0] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+        "runs": len(ordered),
+    }
+
+
+@contextmanager
+def isolated_environment(server: MockServer):
+    """
+    Points `openai/...` models at the stand-in server and keeps tAI's files out of the user's directories.
+
+    History, health, metrics and caches go to throwaway XDG directories, which the
+    scenarios' child processes inherit. The runtime directory is redirected too, so
+    a `tai --daemon` the user has running (with real keys and endpoints) is never
+    found. The environment is restored afterwards.
+    """
+    from tAI.Utils.security import encrypt_data
+
+    saved = dict(os.environ)
+    with tempfile.TemporaryDirectory(prefix="tai-bench-") as root:
+        for variable in ("XDG_STATE_HOME", "XDG_CACHE_HOME", "XDG_CONFIG_HOME", "XDG_RUNTIME_DIR"):
+            os.environ[variable] = os.path.join(root, variable.lower())
+        os.environ["OPENAI_API_BASE"] = server.base_url
+        # The bundled .env leaves OPENAI_API_KEY empty, so the resolver falls back to the environment.
+        os.environ["OPENAI_API_KEY"] = encrypt_data("sk-bench")
+        try:
+            yield
+        finally:
+            os.environ.clear()
+            os.environ.update(saved)
+
+
+def make_app(**kwargs):
+    from tAI.App.app import TAI
+
+    options = dict(models={"Bench": MODEL}, default_model=MODEL, prompt="bench", fullscreen=False, openrouter_all=False, use_cache=False)
+    options.update(kwargs)
+    return TAI(**options)
+
+
+COLD_START_CHILD = """
+import asyncio, sys, time
+sys.path.insert(0, {root!r})
+from tAI.App.app import TAI
+from textual.widgets import Input
+
+async def main():
+    app = TAI(models={{"Bench": "openai/bench"}}, default_model="openai/bench", prompt="bench", fullscreen=False, openrouter_all=False, use_cache=False)
+    async with app.run_test() as pilot:
+        while not app.query_one("#input", Input).has_focus:
+            await pilot.pause(0.001)
+        print(time.time(), flush=True)
+
+asyncio.run(main())
+"""
+
+
+def bench_cold_start(runs: int) -> Dict[str, float]:
+    samples = []
+    code = COLD_START_CHILD.format(root=REPO_ROOT)
+    for _ in range(runs):
+        started = time.time()
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, timeout=SCENARIO_TIMEOUT)
+        samples.append(float(result.stdout.strip().splitlines()[-1]) - started)
+    return summarize(samples)
+
+
+FIRST_KEYSTROKE_CHILD = """
+import asyncio, sys, time
+sys.path.insert(0, {root!r})
+from tAI.App.app import TAI
+from tAI.App.models import MODEL_DICT
+from textual.widgets import Input
+
+async def main():
+    # The full model list, as the real popup shows it.
+    models = dict(MODEL_DICT, Bench="openai/bench")
+    app = TAI(models=models, default_model="openai/bench", prompt="bench", fullscreen=False, openrouter_all=False, use_cache=False)
+    async with app.run_test() as pilot:
+        # pilot.press waits for the CPU to go idle, which the background import prevents; poll instead.
+        asyncio.create_task(pilot.press("x"))
+        while app.query_one("#input", Input).value != "x":
+            await asyncio.sleep(0.001)
+        print(time.time(), flush=True)
+        app.exit()
+
+asyncio.run(main())
+"""
+
+
+def bench_first_keystroke(runs: int) -> Dict[str, float]:
+    """Time to first keystroke: the user starts typing the moment the popup is launched."""
+    samples = []
+    code = FIRST_KEYSTROKE_CHILD.format(root=REPO_ROOT)
+    for _ in range(runs):
+        started = time.time()
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, timeout=SCENARIO_TIMEOUT)
+        samples.append(float(result.stdout.strip().splitlines()[-1]) - started)
+    return summarize(samples)
+
+
+async def _wait_for_command(app, pilot) -> None:
+    """Waits until the mock's command is in #response; fails on an error status or after SCENARIO_TIMEOUT."""
+    deadline = time.monotonic() + SCENARIO_TIMEOUT
+    while app.current_command != MockConfig.command:
+        if app.status_text.startswith("❌"):
+            raise Exception(f"Request failed: {app.status_text}")
+        if time.monotonic() > deadline:
+            raise Exception(f"No response within {SCENARIO_TIMEOUT}s (status: {app.status_text})")
+        await pilot.pause(0.001)
+
+
+async def _submit_to_response(runs: int, stream: bool) -> List[float]:
+    from textual.widgets import Input
+
+    app = make_app(stream_response=stream)
+    samples = []
+    async with app.run_test() as pilot:
+        await pilot.pause()
+        # The client is built in the background after startup; measure steady-state requests.
+        await app.setup_worker.wait()
+        # Execute mode keeps the app open between requests; the reply is recorded, never run.
+        executed = []
+        app.execute_command = executed.append
+        app.execute_mode = True
+        for i in range(runs):
+            app.current_command = ""
+            app.query_one("#input", Input).value = f"find big files {i}"
+            started = time.perf_counter()
+            await pilot.press("enter")
+            await _wait_for_command(app, pilot)
+            samples.append(time.perf_counter() - started)
+    return samples
+
+
+def bench_submit_to_response(runs: int) -> Dict[str, Dict[str, float]]:
+    return {
+        "blocking": summarize(asyncio.run(_submit_to_response(runs, stream=False))),
+        "streaming": summarize(asyncio.run(_submit_to_response(runs, stream=True))),
+    }
+
+
+def _time_calls(function: Callable[[], object], runs: int) -> List[float]:
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def bench_json_decode(runs: int) -> Dict[str, Dict[str, float]]:
+    from tAI.LLM.backends import OpenAIChat
+    from tAI.LLM.decoding import decode_command
+    from tAI.LLM.streaming import CommandStreamParser
+
+    content = json.dumps({"command": MockConfig.command})
+    body = json.dumps({"choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}]})
+    chunks = [content[i:i + 4] for i in range(0, len(content), 4)]
+
+    def parse_stream():
+        parser = CommandStreamParser()
+        for chunk in chunks:
+            parser.feed(chunk)
+        return parser.result().command
+
+    return {
+        "completion": summarize(_time_calls(lambda: decode_command(OpenAIChat.content(json.loads(body))), runs)),
+        "stream": summarize(_time_calls(parse_stream, runs)),
+    }
+
+
+BACKEND_IMPORT_CHILD = """
+import resource, sys, time
+sys.path.insert(0, {root!r})
+started = time.perf_counter()
+from tAI.LLM.LLM_Integration import llm
+from tAI.LLM.backends import make_backend
+llm(prompt="bench", openrouter_all=False, use_cache=False, backend=make_backend({backend!r}))
+print(time.perf_counter() - started, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, flush=True)
+"""
+
+
+def bench_backend_import(runs: int) -> Dict[str, Dict[str, float]]:
+    """What a fresh process pays to be able to send a request: import time and peak memory per backend."""
+    results = {}
+    for backend in ("http", "litellm"):
+        code = BACKEND_IMPORT_CHILD.format(root=REPO_ROOT, backend=backend)
+        samples, rss = [], []
+        for _ in range(runs):
+            result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, timeout=SCENARIO_TIMEOUT)
+            if result.returncode != 0:
+                break
+            seconds, max_rss_kb = result.stdout.split()
+            samples.append(float(seconds))
+            rss.append(int(max_rss_kb))
+        if samples:
+            results[backend] = dict(summarize(samples), peak_rss_mb=round(statistics.median(rss) / 1024, 1))
+        else:
+            # litellm is an optional extra.
+            results[backend] = {"skipped": "not installed"}
+    return results
+
+
+async def _execute_throughput(lines: int) -> Dict[str, float]:
+    app = make_app()
+    async with app.run_test() as pilot:
+        await pilot.pause()
+        started = time.perf_counter()
+        worker = app.execute_command(f"seq 1 {lines}")
+        await worker.wait()
+        elapsed = time.perf_counter() - started
+    return {"lines": lines, "seconds": round(elapsed, 4), "lines_per_second": round(lines / elapsed)}
+
+
+def bench_execute_throughput(lines: int) -> Dict[str, float]:
+    return asyncio.run(_execute_throughput(lines))
+
+
+class FakeController:
+    """Stands in for pynput's keyboard controller and records what was typed."""
+
+    def __init__(self):
+        self.typed = []
+
+    def type(self, text: str) -> None:
+        self.typed.append(text)
+
+
+def bench_paste(runs: int) -> Dict[str, Dict[str, float]]:
+    from tAI.KeyAutomation import Automate, KeystrokeBackend
+
+    class FakeKeystrokeBackend(KeystrokeBackend):
+        def controller(self):
+            return FakeController()
+
+    command = ("find . -type f -name '*.log' -print0 | xargs -0 grep -l ERROR | " * 4)[:250]
+    results = {}
+    for name, backend in {"keystrokes": FakeKeystrokeBackend()}.items():
+        automate = Automate()
+        automate.backends = [backend]
+        results[name] = summarize(_time_calls(lambda: automate.paste_command_to_terminal(command), runs))
+        results[name]["command_length"] = len(command)
+    return results
+
+
+def compare(current: dict, previous: dict, threshold: float) -> List[str]:
+    """Returns a line per p50 metric that got slower than `threshold` (a fraction) since `previous`."""
+    regressions = []
+
+    def walk(now, before, path):
+        for key, value in now.items():
+            if key not in before:
+                continue
+            if isinstance(value, dict):
+                walk(value, before[key], path + [key])
+            elif key == "p50_ms" and before[key] and value > before[key] * (1 + threshold):
+                regressions.append(f"{'.'.join(path)}: {before[key]} ms -> {value} ms")
+
+    walk(current["results"], previous["results"], [])
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Offline end-to-end latency benchmarks for tAI")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.05, help="Mock server latency in seconds")
+    parser.add_argument("--execute-lines", type=int, default=200000)
+    parser.add_argument("--only", nargs="*", help="Run only these scenarios")
+    parser.add_argument("--output", help="Write the JSON results to this file")
+    parser.add_argument("--compare", help="Compare with an earlier results file")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed p50 slowdown when comparing")
+    args = parser.parse_args()
+
+    with MockServer(MockConfig(latency=args.latency, chunk_delay=0.005, trailing_text=" " * 64)) as server, isolated_environment(server):
+        scenarios = {
+            "cold_start": lambda: bench_cold_start(args.runs),
+            "first_keystroke": lambda: bench_first_keystroke(args.runs),
+            "submit_to_response": lambda: bench_submit_to_response(args.runs),
+            "json_decode": lambda: bench_json_decode(args.runs * 100),
+            "backend_import": lambda: bench_backend_import(args.runs),
+            "execute_throughput": lambda: bench_execute_throughput(args.execute_lines),
+            "paste": lambda: bench_paste(args.runs),
+        }
+        results = {name: run() for name, run in scenarios.items() if not args.only or name in args.only}
+
+    report = {
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "mock_latency_s": args.latency,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        for line in regressions:
+            print(f"❌ Regression: {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
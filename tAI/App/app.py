@@ -1,34 +1,158 @@
 import os
 import sys
-import subprocess
+import signal
 import asyncio
+import threading
 import time
-from typing import Optional, List
+from typing import Optional, List, Tuple
 
 from textual.app import App, ComposeResult
 from textual.containers import Container, Vertical, Horizontal
-from textual.widgets import Input, Label, Static, Select, Button, TextArea
+from textual.widgets import Input, Label, Static, Select, Button, TextArea, Log
 from textual.reactive import reactive
 from textual import on, work
 from textual.binding import Binding
 from textual.worker import Worker
 from textual.screen import Screen
+from textual.suggester import Suggester
 
-from tAI.LLM.LLM_Integration import llm
+from tAI.Daemon import client as daemon_client
+from tAI.LLM.catalog import get_catalog
+from tAI.LLM.prompt import estimate_tokens
+from tAI.LLM.result import GenerationResult
+from tAI.Utils import metrics
 from tAI.Utils.config_manager import config_manager
-from tAI.Utils.api_key_manager import update_api_key
+from tAI.Utils.history import EXECUTED, PASTED, get_history
+
+
+# Words that can trail a request without changing it ("... please", "... for me").
+# A submission that only adds these after the speculated text reuses its answer.
+FILLER_WORDS = {"please", "pls", "plz", "thanks", "thank", "you", "thx", "for", "me"}
+
+
+def is_stable_extension(speculated: str, submitted: str) -> bool:
+    """
+    Returns whether a submitted request asks for the same thing as the speculated one.
+
+    Both are normalized queries. The submission must start with the speculated
+    words and may only add filler words after them.
+
+    Args:
+        speculated (str): The normalized query the speculation was started for.
+        submitted (str): The normalized query that was submitted.
+    """
+    speculated_words, submitted_words = speculated.split(), submitted.split()
+    if submitted_words[:len(speculated_words)] != speculated_words:
+        return False
+    return all(word in FILLER_WORDS for word in submitted_words[len(speculated_words):])
+
+
+async def run_in_daemon_thread(function):
+    """
+    Runs a blocking function on a daemon thread and returns its result.
+
+    Unlike asyncio.to_thread, exiting the app doesn't wait for the thread, so a
+    slow import that is no longer needed can't hold up pasting the command.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def settle(result=None, error=None):
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def run():
+        try:
+            result = function()
+        except Exception as e:
+            settle_with = (None, e)
+        else:
+            settle_with = (result, None)
+        try:
+            loop.call_soon_threadsafe(settle, *settle_with)
+        except RuntimeError:
+            # The app has already exited and its loop is closed.
+            pass
+
+    threading.Thread(target=run, daemon=True).start()
+    return await future
+
+
+class HistorySuggester(Suggester):
+    """Suggests the most recent past request that completes what has been typed."""
+
+    def __init__(self) -> None:
+        # Requests are added to the history while the app runs, so don't cache suggestions.
+        super().__init__(use_cache=False)
+
+    async def get_suggestion(self, value: str) -> Optional[str]:
+        # Off the event loop, so a busy database never delays a keystroke.
+        return await asyncio.to_thread(get_history().suggest, value)
+
+
+class HistoryInput(Input):
+    """
+    The request input, with recall of past requests.
+
+    Up and Down step through the past requests that start with what was typed
+    before the first Up, most recent first, like a shell's history search.
+    Editing the recalled text starts a new search.
+    """
+
+    BINDINGS = [
+        Binding("up", "history_previous", "Previous request", show=False),
+        Binding("down", "history_next", "Next request", show=False),
+    ]
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, suggester=HistorySuggester(), **kwargs)
+        self._matches: Optional[List[str]] = None
+        self._position = -1
+        self._draft = ""
+        self._recalled = ""
+
+    def _recall(self, value: str) -> None:
+        self._recalled = value
+        self.value = value
+        self.cursor_position = len(value)
+
+    def action_history_previous(self) -> None:
+        if self._matches is None or self.value != self._recalled:
+            self._draft = self.value
+            self._matches = [entry.query for entry in get_history().search(self.value)]
+            self._position = -1
+        if self._position + 1 < len(self._matches):
+            self._position += 1
+            self._recall(self._matches[self._position])
+
+    def action_history_next(self) -> None:
+        if self._matches is None or self.value != self._recalled:
+            return
+        self._position -= 1
+        if self._position < 0:
+            self._matches = None
+            self._recall(self._draft)
+        else:
+            self._recall(self._matches[self._position])
 
 
 class SettingsScreen(Screen):
     """The settings screen."""
 
-    def __init__(self, model_dict: dict, default_model_key: str, prompt: str, fullscreen: bool, openrouter_all: bool) -> None:
+    def __init__(self, model_dict: dict, default_model_key: str, prompt: str, fullscreen: bool, openrouter_all: bool, stream_response: bool, speculative: bool, instant_answers: bool) -> None:
         super().__init__()
         self.model_dict = model_dict
         self.default_model_key = default_model_key
         self.prompt = prompt
         self.fullscreen = fullscreen
         self.openrouter_all = openrouter_all
+        self.stream_response = stream_response
+        self.speculative = speculative
+        self.instant_answers = instant_answers
         self.settings_tab = "default_model"
 
     def compose(self) -> ComposeResult:
@@ -81,6 +205,7 @@ class SettingsScreen(Screen):
                     Container(
                         Static("Prompt Config", id="prompt_title"),
                         TextArea(self.prompt, id="prompt_textarea"),
+                        Static(id="prompt_tokens"),
                         Button("Save", id="save_prompt"),
                         id="prompt_panel",
                         classes="hidden"
@@ -100,6 +225,24 @@ class SettingsScreen(Screen):
                             value=self.openrouter_all,
                             id="openrouter_select"
                         ),
+                        Static("Stream responses:", id="stream_title"),
+                        Select(
+                            options=[("Yes", True), ("No", False)],
+                            value=self.stream_response,
+                            id="stream_select"
+                        ),
+                        Static("Speculative pre-generation (starts generating while you type, uses more API requests):", id="speculative_title"),
+                        Select(
+                            options=[("Yes", True), ("No", False)],
+                            value=self.speculative,
+                            id="speculative_select"
+                        ),
+                        Static("Instant answers (answer common requests offline, without asking the model):", id="instant_title"),
+                        Select(
+                            options=[("Yes", True), ("No", False)],
+                            value=self.instant_answers,
+                            id="instant_select"
+                        ),
 
                         Button("Save", id="save_others"),
                         id="others_panel",
@@ -136,6 +279,25 @@ class SettingsScreen(Screen):
         elif event.button.id == "save_others":
             self.save_other_settings()
             
+    def on_mount(self) -> None:
+        self.update_prompt_tokens(self.prompt)
+
+    @on(TextArea.Changed, "#prompt_textarea")
+    def handle_prompt_change(self, event: TextArea.Changed) -> None:
+        self.update_prompt_tokens(event.text_area.text)
+
+    def update_prompt_tokens(self, prompt: str) -> None:
+        """Shows the prompt's estimated token count and warns when it exceeds the budget."""
+        tokens = estimate_tokens(prompt)
+        budget = config_manager.get_prompt_token_budget()
+        label = self.query_one("#prompt_tokens", Static)
+        if tokens > budget:
+            label.update(f"⚠️ ~{tokens} tokens, over the {budget} token budget. The prompt is sent with every request, so a longer one adds latency and cost.")
+            label.add_class("over_budget")
+        else:
+            label.update(f"~{tokens} tokens (budget {budget})")
+            label.remove_class("over_budget")
+
     def switch_tab(self):
         for btn in self.query("#settings_nav Button"):
             btn.remove_class("active")
@@ -178,12 +340,18 @@ class SettingsScreen(Screen):
             self.app.status_text = "❌ Please enter an API key"
             return
         
+        # Not imported at startup: it loads the encryption stack.
+        from tAI.Utils.api_key_manager import update_api_key
         update_api_key(provider, api_key)
         api_key_input.value = ""
-        self.app.status_text = f"✅ {provider.capitalize()} API key saved successfully (Please restart the app to apply the changes)"
+        self.app.status_text = f"✅ {provider.capitalize()} API key saved successfully"
 
     def save_prompt(self):
         prompt_text = self.query_one("#prompt_textarea", TextArea).text
+        if prompt_text != self.app.prompt:
+            # Commands generated with the old prompt shouldn't be served anymore.
+            from tAI.LLM.cache import get_cache
+            get_cache().invalidate_prompt(self.app.prompt)
         config_manager.set_prompt(prompt_text)
         self.app.prompt = prompt_text
         self.app.setup_llm()
@@ -192,14 +360,32 @@ class SettingsScreen(Screen):
     def save_other_settings(self):
         fullscreen = self.query_one("#fullscreen_select", Select).value
         openrouter_all = self.query_one("#openrouter_select", Select).value
-        config_manager.set_set_full_screen(fullscreen)
-        config_manager.set_set_openrouter_for_all(openrouter_all)
+        stream_response = self.query_one("#stream_select", Select).value
+        speculative = self.query_one("#speculative_select", Select).value
+        instant_answers = self.query_one("#instant_select", Select).value
+        with config_manager.transaction():
+            config_manager.set_set_full_screen(fullscreen)
+            config_manager.set_set_openrouter_for_all(openrouter_all)
+            config_manager.set_set_stream_response(stream_response)
+            config_manager.set_set_speculative(speculative)
+            config_manager.set_set_instant_answers(instant_answers)
 
+        # Everything but full screen takes effect on the next request, no restart needed.
+        fullscreen_changed = fullscreen != self.app.fullscreen
         self.app.fullscreen = fullscreen
-        self.app.openrouter_all = openrouter_all 
-        
-    
-        self.app.status_text = "✅ Settings saved (Please restart the app to apply the changes)"
+        if openrouter_all != self.app.openrouter_all:
+            self.app.openrouter_all = openrouter_all
+            # The in-process client keeps the routing it was built with; the daemon reads it per request.
+            self.app.setup_llm()
+        self.app.stream_response = stream_response
+        self.app.speculative = speculative
+        self.app.instant_answers = instant_answers
+
+        if fullscreen_changed:
+            # Inline or full screen is chosen when the app starts.
+            self.app.status_text = "✅ Settings saved (full screen mode applies from the next launch)"
+        else:
+            self.app.status_text = "✅ Settings saved"
 
 
 class TAI(App):
@@ -208,28 +394,54 @@ class TAI(App):
 
     BINDINGS = [
         Binding("escape", "quit", "Exit", priority=True),
-        Binding("ctrl+c", "quit", "Cancel", priority=True),
+        Binding("ctrl+c", "interrupt", "Cancel", priority=True),
         Binding("ctrl+e", "toggle_mode", "Toggle Execute/Paste Mode", priority=True),
         Binding("ctrl+s", "show_settings", "Settings", priority=True),
     ]
 
     status_text = reactive("Initializing...")
     current_command = reactive("")
-    command_output = reactive("")
     show_response = reactive(False)
     show_output = reactive(False)
     execute_mode = reactive(False)
     pending_paste_command = None
+    llm = None
+    use_daemon = False
+    setup_worker: Optional[Worker] = None
+    # (model, normalized query, worker) of the latest speculative generation.
+    speculation: Optional[Tuple[str, str, Worker]] = None
 
-    def __init__(self, models: dict, default_model: str, prompt: str, fullscreen: bool, openrouter_all: bool,):
+    def __init__(self, models: dict, default_model: str, prompt: str, fullscreen: bool, openrouter_all: bool, use_cache: bool = True, stream_response: bool = True, speculative: bool = False, instant_answers: bool = True, exit_delay: float = 1):
         super().__init__()
+        # How long the status stays visible before exiting to paste the command.
+        self.exit_delay = exit_delay
+        self.instant_answers = instant_answers
+        self.use_cache = use_cache
+        self.stream_response = stream_response
+        self.speculative = speculative
+        self.speculative_debounce = config_manager.get_speculative_debounce_ms() / 1000
+        self.speculative_min_interval = config_manager.get_speculative_min_interval()
+        self.speculative_budget = config_manager.get_speculative_max_per_session()
+        self._speculation_timer = None
+        self._last_speculation_at = 0.0
+        self.execute_timeout = config_manager.get_execute_timeout()
+        self.execute_max_lines = config_manager.get_execute_max_lines()
+        self._process = None
         self.model_dict = models
         self.default_model_value = default_model
         self.model = self.default_model_value
         self.prompt = prompt
         self.fullscreen = fullscreen
         self.openrouter_all = openrouter_all
-        self.default_model_key = [k for k, v in self.model_dict.items() if v == self.default_model_value][0]
+        self.default_model_key = self.model_name(self.default_model_value)
+
+    def model_name(self, model_id: str) -> Optional[str]:
+        """Returns the display name of a model id, looked up in the catalog's index."""
+        name = get_catalog().name_of(model_id)
+        if name is not None and self.model_dict.get(name) == model_id:
+            return name
+        # The app was given models other than the configured ones (e.g. by the benchmarks).
+        return next((name for name, model in self.model_dict.items() if model == model_id), None)
 
     def compose(self) -> ComposeResult:
         yield Container(
@@ -239,17 +451,18 @@ class TAI(App):
                 id="header"
             ),
             Select(
-                options=[(name, name) for name in self.model_dict.keys()],
+                # Just the selected model for the first frame; the rest is filled in right after.
+                options=[(self.default_model_key, self.default_model_key)],
                 value=self.default_model_key,
                 id="model_select"
             ),
-            Input(
+            HistoryInput(
                 placeholder="e.g., 'list all files larger than 100MB'",
                 id="input"
             ),
             Static(self.status_text, id="status"),
             Static("", id="response", classes="hidden"),
-            Static("", id="output", classes="hidden"),
+            Log(id="output", max_lines=self.execute_max_lines, classes="hidden"),
             id="main_container"
         )
         
@@ -260,6 +473,9 @@ class TAI(App):
             self.prompt,
             self.fullscreen,
             self.openrouter_all,
+            self.stream_response,
+            self.speculative,
+            self.instant_answers,
         ))
 
     @on(Button.Pressed, "#settings_btn")
@@ -267,17 +483,61 @@ class TAI(App):
         self.action_show_settings()
 
     def on_mount(self) -> None:
+        # Typing works from the first frame; the model list and the LLM client follow in the background.
         self.query_one("#input", Input).focus()
+        self.call_after_refresh(self.load_model_options)
         self.setup_llm()
 
-    def setup_llm(self):
+    def load_model_options(self) -> None:
+        """Fills the model selector with every model once the popup is on screen."""
+        select = self.query_one("#model_select", Select)
+        selected = self.model_name(self.model) or self.default_model_key
+        # Replacing the options clears the selection for a moment, which isn't a model change.
+        with select.prevent(Select.Changed):
+            select.set_options((name, name) for name in self.model_dict.keys())
+            select.value = selected
+
+    def setup_llm(self) -> None:
+        """Connects to the daemon or builds the in-process LLM client without blocking the UI."""
+        self.setup_worker = self.run_worker(self._setup_llm(), group="setup", exclusive=True)
+
+    async def _setup_llm(self) -> None:
         try:
-            self.llm = llm(prompt=self.prompt, openrouter_all=self.openrouter_all)
+            # A running daemon already holds a warm client, so skip importing the backend here.
+            self.use_daemon = await asyncio.to_thread(daemon_client.is_running)
+            if self.use_daemon:
+                self.llm = None
+            else:
+                # Importing the backend (seconds with litellm) happens while the user is typing.
+                self.llm = await run_in_daemon_thread(self.build_llm)
             mode = "EXECUTE" if self.execute_mode else "PASTE"
             self.status_text = f"Ready! Mode: {mode} (Ctrl+E to toggle) | Type your command request..."
+            self.warm_up_model(self.model)
         except Exception as e:
             self.status_text = f"Error initializing LLM: {str(e)}"
 
+    def build_llm(self):
+        with metrics.span("import_llm"):
+            from tAI.LLM.LLM_Integration import llm
+
+        return llm(prompt=self.prompt, openrouter_all=self.openrouter_all, use_cache=self.use_cache)
+
+    @work(exclusive=True, group="warm_up")
+    async def warm_up_model(self, model: str) -> None:
+        """Gets a local model loaded on its server while the user is still typing."""
+        from tAI.Utils.API import is_local_model
+
+        if not is_local_model(model):
+            return
+        if self.use_daemon:
+            await asyncio.to_thread(daemon_client.warm_up, model, self.prompt, self.openrouter_all)
+        elif self.llm is not None:
+            await self.llm.awarm_up(model)
+
+    @property
+    def llm_ready(self) -> bool:
+        return self.use_daemon or self.llm is not None
+
     def watch_status_text(self, status: str) -> None:
         try:
             self.query_one("#status", Static).update(status)
@@ -297,100 +557,317 @@ class TAI(App):
         except:
             pass
 
-    def watch_command_output(self, output: str) -> None:
+    def clear_output(self) -> None:
         try:
-            output_widget = self.query_one("#output", Static)
-            if output:
-                output_widget.update(f"Output:\n{output}")
-                output_widget.remove_class("hidden")
-                self.show_output = True
-            else:
-                output_widget.add_class("hidden")
-                self.show_output = False
+            output_widget = self.query_one("#output", Log)
+            output_widget.clear()
+            output_widget.add_class("hidden")
+            self.show_output = False
         except:
             pass
 
     def watch_execute_mode(self, mode: bool) -> None:
-        if self.llm:
+        if self.llm_ready:
             mode_text = "EXECUTE" if mode else "PASTE"
             self.status_text = f"Ready! Mode: {mode_text} (Ctrl+E to toggle) | Type your command request..."
 
     def action_toggle_mode(self) -> None:
         self.execute_mode = not self.execute_mode
-        self.command_output = ""
+        self.clear_output()
         
     @on(Select.Changed, "#model_select")
     def handle_llm_change(self, event: Select.Changed) -> None:
         self.model = self.model_dict[str(event.value)]
+        if self.llm_ready:
+            self.warm_up_model(self.model)
+
+    @on(Input.Changed, "#input")
+    def handle_input_change(self, event: Input.Changed) -> None:
+        if not self.speculative:
+            return
+        if self._speculation_timer is not None:
+            self._speculation_timer.stop()
+        query = event.value.strip()
+        if query:
+            self._speculation_timer = self.set_timer(
+                self.speculative_debounce,
+                lambda: self.start_speculation(self.model, query),
+            )
+
+    async def start_speculation(self, model: str, query: str) -> None:
+        """
+        Starts a background generation for text the user has stopped typing, within the spend limits.
+
+        It runs as the debounce timer's callback, so typing on or submitting stops
+        the timer and cancels a check that is still waiting for the history.
+        """
+        from tAI.LLM.cache import normalize_query
+
+        normalized = normalize_query(query)
+        # Very short inputs are almost never the final request.
+        if len(normalized.split()) < 2 or not self.llm_ready:
+            return
+        if self.instant_answer(query) is not None or await asyncio.to_thread(self.history_answer, model, query) is not None:
+            # Answered offline on submit, no request needed.
+            return
+        if self.speculation is not None and self.speculation[0] == model and is_stable_extension(self.speculation[1], normalized):
+            # The running speculation already answers this text.
+            return
+        now = time.monotonic()
+        if self.speculative_budget <= 0 or now - self._last_speculation_at < self.speculative_min_interval:
+            return
+        self.speculative_budget -= 1
+        self._last_speculation_at = now
+        # exclusive=True in its own group cancels the previous, now stale, speculation.
+        worker = self.run_worker(self._generate(model, query), group="speculative", exclusive=True, exit_on_error=False)
+        self.speculation = (model, normalized, worker)
+
+    def instant_answer(self, query: str):
+        """Returns the offline answer for a query if instant answers are on and one matches."""
+        if not self.instant_answers:
+            return None
+        from tAI.LLM.instant import instant_result
+
+        with metrics.span("instant_lookup"):
+            return instant_result(query)
+
+    def history_answer(self, model: str, query: str) -> Optional[GenerationResult]:
+        """Returns the command used for this exact request before, if it is still valid."""
+        if not self.use_cache:
+            return None
+        with metrics.span("history_lookup"):
+            command = get_history().lookup(query, model, self.prompt)
+        if command is None:
+            return None
+        return GenerationResult(command=command, model=model, source="history")
+
+    def take_speculation(self, model: str, query: str) -> Optional[Worker]:
+        """Returns the speculative worker if it was started for this request or a stable prefix of it."""
+        from tAI.LLM.cache import normalize_query
+
+        speculation, self.speculation = self.speculation, None
+        if speculation is None:
+            return None
+        spec_model, spec_query, worker = speculation
+        # Case, whitespace, trailing punctuation and trailing filler words don't change
+        # the request; anything else does.
+        if spec_model == model and is_stable_extension(spec_query, normalize_query(query)):
+            return worker
+        worker.cancel()
+        return None
 
     @on(Input.Submitted)
     def handle_submission(self, event: Input.Submitted) -> None:
         query = event.value.strip()
         if not query:
             return
-        if not self.llm:
-            self.status_text = "❌ LLM not initialized"
-            return
         
+        if self._speculation_timer is not None:
+            self._speculation_timer.stop()
         self.current_command = ""
-        self.command_output = ""
+        self.clear_output()
         self.status_text = "🔄 Generating command..."
-        self.generate_command(self.model,query)
+        self.generate_command(self.model, query, self.take_speculation(self.model, query))
 
     @work(exclusive=True)
-    async def generate_command(self, model: str, query: str) -> None:
+    async def generate_command(self, model: str, query: str, speculation: Optional[Worker] = None) -> None:
         try:
-            command = await asyncio.to_thread(
-                self.llm.generate_command,
-                model,
-                query
+            result = self.instant_answer(query) or await asyncio.to_thread(self.history_answer, model, query)
+            prefetched = False
+            if result is not None and speculation is not None:
+                speculation.cancel()
+            elif speculation is not None:
+                try:
+                    await speculation.wait()
+                    result = speculation.result
+                    prefetched = True
+                except Exception:
+                    # The speculative request failed or was cancelled; ask again for real.
+                    result = None
+            if result is None:
+                # Streamed tokens are rendered into #response as they arrive.
+                on_partial = self.show_partial if self.stream_response else None
+                with metrics.span("generate", model=model):
+                    result = await self._generate(model, query, on_partial)
+            command = result.command
+            handed_off = time.perf_counter()
+            self.current_command = command
+            self.call_after_refresh(
+                lambda: metrics.record("ui_handoff", time.perf_counter() - handed_off, model=result.model)
             )
-            
+            if prefetched:
+                generated = "✅ Command generated (prefetched)!"
+            elif result.source == "instant":
+                generated = "⚡ Instant answer (offline)!"
+            elif result.source == "history":
+                generated = "✅ Command reused from history!"
+            elif result.cached:
+                generated = "✅ Command generated (cached)!"
+            elif result.model != model:
+                # Race and auto choose a model themselves; otherwise a different model means a fallback.
+                reason = {"race": "race", "auto": "auto"}.get(model, "fallback")
+                generated = f"✅ Command generated by {result.model} ({reason})!"
+            else:
+                generated = "✅ Command generated!"
+
+            action = EXECUTED if self.execute_mode else PASTED
+            await asyncio.to_thread(get_history().add, query, model, self.prompt, command, action)
+
             if self.execute_mode:
-                self.status_text = "✅ Command generated! Executing..."
-                await self.execute_command(command)
+                self.status_text = f"{generated} Executing..."
+                self.execute_command(command)
             else:
-                self.status_text = "✅ Command generated! Exiting and pasting to terminal..."
+                self.status_text = f"{generated} Exiting and pasting to terminal..."
                 self.pending_paste_command = command
-                await asyncio.sleep(1)
+                if self.exit_delay:
+                    with metrics.span("exit_delay"):
+                        await asyncio.sleep(self.exit_delay)
                 self.exit(result=command)
             
         except Exception as e:
             self.status_text = f"❌ Error: {str(e)}"
 
-    @work(thread=True)
-    def execute_command(self, command: str) -> None:
+    async def _generate(self, model: str, query: str, on_partial=None):
+        """
+        Generates a command through the daemon if one is running, in-process otherwise.
+
+        Everything is awaited on the event loop, so cancelling the worker (Esc,
+        resubmission, a newer speculation) aborts the in-flight request.
+        """
+        if self.setup_worker is not None and not self.setup_worker.is_finished:
+            # Submitted while the client is still being set up.
+            try:
+                await self.setup_worker.wait()
+            except Exception:
+                pass
+        result = None
+        if self.use_daemon:
+            result = await daemon_client.agenerate(
+                model,
+                query,
+                self.prompt,
+                self.openrouter_all,
+                self.use_cache,
+                on_partial,
+            )
+        if result is None:
+            # No daemon (or it went away): generate in-process.
+            if self.llm is None:
+                self.use_daemon = False
+                self.llm = await run_in_daemon_thread(self.build_llm)
+            if on_partial is not None:
+                result = await self.llm.astream(model, query, on_partial)
+            else:
+                result = await self.llm.agenerate(model, query)
+        return result
+
+    def show_partial(self, partial: str) -> None:
+        """Shows the partially streamed command in #response."""
+        self.current_command = partial
+
+    @work(exclusive=True, group="execute")
+    async def execute_command(self, command: str) -> None:
+        """
+        Runs the command and streams its output into #output as it is produced.
+
+        #output only keeps the last `execute_max_lines` lines and overly long lines
+        are truncated, so memory stays bounded however much the command prints.
+        """
+        output_widget = self.query_one("#output", Log)
+        output_widget.clear()
+        output_widget.border_title = "Output"
+        output_widget.remove_class("hidden")
+        self.show_output = True
+        self.status_text = "▶️ Running... (Ctrl+C to stop the command)"
+
         try:
-            result = subprocess.run(
+            self._process = await asyncio.create_subprocess_shell(
                 command,
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=30
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+                # Its own process group, so stopping it also stops its pipeline children.
+                start_new_session=os.name == "posix",
             )
-            
-            output = ""
-            if result.stdout:
-                output += result.stdout
-            if result.stderr:
-                output += f"\nErrors:\n{result.stderr}"
-            
-            if not output.strip():
-                output = f"Command executed successfully (exit code: {result.returncode})"
-            
-            self.call_from_thread(self._update_after_execution, output, result.returncode)
-            
-        except subprocess.TimeoutExpired:
-            self.call_from_thread(self._update_after_execution, "Command timed out after 30 seconds", 1)
         except Exception as e:
-            self.call_from_thread(self._update_after_execution, f"Error executing command: {str(e)}", 1)
+            output_widget.write_line(f"Error executing command: {str(e)}")
+            self._update_after_execution(1)
+            return
 
-    def _update_after_execution(self, output: str, exit_code: int) -> None:
-        self.command_output = output
+        process = self._process
+        timed_out = False
+        started = time.perf_counter()
+        try:
+            async with asyncio.timeout(self.execute_timeout or None):
+                await self._stream_output(process, output_widget)
+                await process.wait()
+        except TimeoutError:
+            timed_out = True
+            await self._stop_process(process)
+        except asyncio.CancelledError:
+            await self._stop_process(process)
+            self.status_text = "⏹️ Command stopped. Press Esc to exit or continue..."
+            raise
+        finally:
+            self._process = None
+            metrics.record("execute", time.perf_counter() - started)
+
+        if timed_out:
+            output_widget.write_line(f"Command timed out after {self.execute_timeout} seconds")
+            self._update_after_execution(1)
+        else:
+            if output_widget.line_count == 0:
+                output_widget.write_line(f"Command executed successfully (exit code: {process.returncode})")
+            self._update_after_execution(process.returncode)
+
+    # Longer lines keep their first MAX_LINE_LENGTH characters, however they arrive in chunks.
+    MAX_LINE_LENGTH = 4096
+
+    async def _stream_output(self, process, output_widget: Log) -> None:
+        """Copies the process output to the log in chunks, one batch of lines per read."""
+        pending = ""
+        while chunk := await process.stdout.read(64 * 1024):
+            lines = (pending + chunk.decode(errors="replace")).split("\n")
+            pending = lines.pop()[:self.MAX_LINE_LENGTH]
+            if lines:
+                output_widget.write_lines(line[:self.MAX_LINE_LENGTH] for line in lines)
+        if pending:
+            output_widget.write_line(pending)
+
+    async def _stop_process(self, process) -> None:
+        """Terminates the running command (and its process group), killing it if it won't stop."""
+        if process.returncode is not None:
+            return
+        try:
+            if os.name == "posix":
+                os.killpg(process.pid, signal.SIGTERM)
+            else:
+                process.terminate()
+            try:
+                await asyncio.wait_for(process.wait(), 2)
+            except asyncio.TimeoutError:
+                if os.name == "posix":
+                    os.killpg(process.pid, signal.SIGKILL)
+                else:
+                    process.kill()
+                await process.wait()
+        except ProcessLookupError:
+            pass
+
+    def _update_after_execution(self, exit_code: int) -> None:
         if exit_code == 0:
             self.status_text = "✅ Command executed successfully! Press Esc to exit or continue..."
         else:
             self.status_text = f"⚠️ Command failed (exit code: {exit_code}). Press Esc to exit or continue..."
 
+    def action_interrupt(self) -> None:
+        """Ctrl+C stops the running command if there is one, and exits otherwise."""
+        if self._process is not None and self._process.returncode is None:
+            self.workers.cancel_group(self, "execute")
+            return
+        self.action_quit()
+
     def action_quit(self) -> None:
+        # Abort in-flight requests instead of waiting for them on the way out.
+        self.workers.cancel_all()
         self.exit()
\ No newline at end of file
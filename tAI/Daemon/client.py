@@ -0,0 +1,182 @@
+"""
+This module is the thin client side of the tAI daemon.
+
+It only depends on the standard library so that callers can talk to a warm
+daemon without importing the LLM backend. Every function returns None (instead of
+raising) when no daemon is listening, including when the socket can't be reached
+at all (no runtime directory, connection reset, timeout), so callers can fall
+back to in-process generation. Only the server creates the runtime directory.
+"""
+import asyncio
+import json
+import os
+import socket
+from typing import Any, Callable, Dict, Optional
+
+from tAI.LLM.result import GenerationResult
+from tAI.Utils.paths import runtime_dir
+
+SOCKET_NAME = "daemon.sock"
+CONNECT_TIMEOUT = 0.2
+# Generation can take as long as the slowest provider, so only connecting is short.
+REQUEST_TIMEOUT = 120
+
+
+class DaemonError(Exception):
+    """A generation error reported by the daemon, with the provider's HTTP status if there was one."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _error(reply: Dict[str, Any]) -> DaemonError:
+    return DaemonError(reply.get("error", "Unknown daemon error"), reply.get("status_code"))
+
+
+def socket_path() -> str:
+    """Returns the path of the daemon's Unix domain socket, without creating its directory."""
+    return os.path.join(runtime_dir(create=False), SOCKET_NAME)
+
+
+def request(payload: Dict[str, Any], timeout: float = REQUEST_TIMEOUT, on_partial: Optional[Callable[[str], None]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Sends one request to the daemon and returns its decoded reply.
+
+    Args:
+        payload (dict): The JSON-serializable request.
+        timeout (float): Seconds to wait for the reply once connected.
+        on_partial (callable): Called with each `{"partial": ...}` message the daemon
+            streams before its final reply.
+
+    Returns:
+        The reply, or None if no daemon is listening.
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    try:
+        path = socket_path()
+        if not os.path.exists(path):
+            return None
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(CONNECT_TIMEOUT)
+            sock.connect(path)
+            sock.settimeout(timeout)
+            sock.sendall(json.dumps(payload).encode() + b"\n")
+            with sock.makefile("rb") as reader:
+                for line in reader:
+                    reply = json.loads(line)
+                    if "partial" not in reply:
+                        return reply
+                    if on_partial is not None:
+                        on_partial(reply["partial"])
+    except OSError:
+        # Unreachable, refused, reset or timed out (socket.timeout is an OSError): no daemon.
+        return None
+    return None
+
+
+def is_running() -> bool:
+    """Checks whether a daemon is answering on the socket."""
+    reply = request({"action": "ping"}, timeout=CONNECT_TIMEOUT)
+    return bool(reply and reply.get("ok"))
+
+
+def warm_up(model: str, prompt: str, openrouter_all: bool) -> bool:
+    """Asks the daemon to load a local model ahead of the first request. Returns False if no daemon is running."""
+    reply = request({"action": "warm_up", "model": model, "prompt": prompt, "openrouter_all": openrouter_all})
+    return bool(reply and reply.get("ok"))
+
+
+def generate(
+    model: str,
+    query: str,
+    prompt: str,
+    openrouter_all: bool,
+    use_cache: bool = True,
+    on_partial: Optional[Callable[[str], None]] = None,
+) -> Optional[GenerationResult]:
+    """
+    Asks the daemon to generate a command.
+
+    When `on_partial` is given the daemon streams the response and the callback
+    receives the command decoded so far as it grows.
+
+    Returns:
+        The generation result, or None if no daemon is running.
+
+    Raises:
+        Exception: If the daemon is running but generation failed.
+    """
+    reply = request({
+        "action": "generate",
+        "model": model,
+        "query": query,
+        "prompt": prompt,
+        "openrouter_all": openrouter_all,
+        "use_cache": use_cache,
+        "stream": on_partial is not None,
+    }, on_partial=on_partial)
+    if reply is None:
+        return None
+    if not reply.get("ok"):
+        raise _error(reply)
+    return GenerationResult(command=reply["command"], model=reply["model"], source=reply["source"])
+
+
+async def agenerate(
+    model: str,
+    query: str,
+    prompt: str,
+    openrouter_all: bool,
+    use_cache: bool = True,
+    on_partial: Optional[Callable[[str], None]] = None,
+    fallback: bool = True,
+) -> Optional[GenerationResult]:
+    """
+    Async variant of `generate`.
+
+    Cancelling the awaiting task closes the connection, which makes the daemon
+    abort the provider request too. With `fallback` off, the daemon doesn't try
+    the fallback models.
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_unix_connection(socket_path()), CONNECT_TIMEOUT)
+    except (OSError, asyncio.TimeoutError):
+        return None
+
+    try:
+        writer.write(json.dumps({
+            "action": "generate",
+            "model": model,
+            "query": query,
+            "prompt": prompt,
+            "openrouter_all": openrouter_all,
+            "use_cache": use_cache,
+            "stream": on_partial is not None,
+            "fallback": fallback,
+        }).encode() + b"\n")
+        await writer.drain()
+        while line := await reader.readline():
+            reply = json.loads(line)
+            if "partial" in reply:
+                if on_partial is not None:
+                    on_partial(reply["partial"])
+                continue
+            if not reply.get("ok"):
+                raise _error(reply)
+            return GenerationResult(command=reply["command"], model=reply["model"], source=reply["source"])
+    except OSError:
+        # The daemon went away mid-request.
+        return None
+    finally:
+        writer.close()
+    return None
+
+
+def stop() -> bool:
+    """Asks a running daemon to shut down. Returns False if none was running."""
+    reply = request({"action": "shutdown"}, timeout=CONNECT_TIMEOUT)
+    return reply is not None
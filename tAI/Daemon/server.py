@@ -0,0 +1,165 @@
+"""
+This module implements the opt-in tAI daemon.
+
+The daemon keeps the LLM backend imported, the `llm` objects and decrypted
+credentials in memory and the backend's HTTP connections warm, and serves generation requests as
+newline-delimited JSON over a Unix domain socket (see tAI/Daemon/client.py).
+"""
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+from typing import Any, Dict, Tuple
+
+from tAI.Daemon import client
+from tAI.Utils import metrics
+from tAI.Utils.config_manager import config_manager
+
+
+class DaemonServer:
+    """Serves generation requests from a single warm process."""
+
+    def __init__(self, socket_path: str):
+        self.socket_path = socket_path
+        self._llms: Dict[Tuple[str, bool, bool], Any] = {}
+        self._stopped = None
+
+    def get_llm(self, prompt: str, openrouter_all: bool, use_cache: bool = True):
+        """Returns the cached `llm` object for a prompt/openrouter_all/use_cache combination."""
+        from tAI.LLM.LLM_Integration import llm
+
+        key = (prompt, openrouter_all, use_cache)
+        if key not in self._llms:
+            self._llms[key] = llm(prompt=prompt, openrouter_all=openrouter_all, use_cache=use_cache)
+        return self._llms[key]
+
+    def warm_up(self) -> None:
+        """Imports the LLM backend and resolves the default model's credentials ahead of the first request."""
+        from tAI.Utils.API import get_api_key
+
+        openrouter_all = config_manager.get_set_openrouter_for_all()
+        self.get_llm(config_manager.get_prompt(), openrouter_all)
+        model = config_manager.get_default_model()
+        if openrouter_all and not model.startswith("openrouter/"):
+            model = "openrouter/" + model
+        try:
+            get_api_key(model, openrouter_all)
+        except Exception:
+            # A missing key only matters once a request actually needs it.
+            pass
+
+    async def handle_request(self, payload: Dict[str, Any], writer: asyncio.StreamWriter) -> Dict[str, Any]:
+        action = payload.get("action")
+        if action == "ping":
+            return {"ok": True, "pid": os.getpid()}
+        if action == "shutdown":
+            self._stopped.set()
+            return {"ok": True}
+        if action == "warm_up":
+            try:
+                generator = self.get_llm(payload["prompt"], payload["openrouter_all"])
+                await generator.awarm_up(payload["model"])
+            except Exception as e:
+                return {"ok": False, "error": str(e)}
+            return {"ok": True}
+        if action == "generate":
+            try:
+                generator = self.get_llm(payload["prompt"], payload["openrouter_all"], payload.get("use_cache", True))
+                if payload.get("stream"):
+                    def on_partial(partial: str) -> None:
+                        writer.write(json.dumps({"partial": partial}).encode() + b"\n")
+
+                    result = await generator.astream(payload["model"], payload["query"], on_partial)
+                else:
+                    result = await generator.agenerate(payload["model"], payload["query"], payload.get("fallback", True))
+                return {"ok": True, "command": result.command, "model": result.model, "source": result.source}
+            except Exception as e:
+                from tAI.LLM.health import is_rate_limit_error
+
+                # The status lets batch mode recognize rate limits and back off.
+                status = 429 if is_rate_limit_error(e) else getattr(e, "status_code", None)
+                return {"ok": False, "error": str(e), "status_code": status if isinstance(status, int) else None}
+            finally:
+                metrics.flush()
+        return {"ok": False, "error": f"Unknown action: {action}"}
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serves one request per connection and cancels it if the client hangs up first."""
+        try:
+            line = await reader.readline()
+            if not line:
+                return
+            try:
+                payload = json.loads(line)
+            except json.JSONDecodeError as e:
+                reply = {"ok": False, "error": f"Malformed request: {e}"}
+            else:
+                request = asyncio.create_task(self.handle_request(payload, writer))
+                # Clients send nothing after the request, so EOF means they went away
+                # (Esc, resubmission) and the in-flight provider request can be aborted.
+                hangup = asyncio.create_task(reader.read())
+                done, _ = await asyncio.wait({request, hangup}, return_when=asyncio.FIRST_COMPLETED)
+                if request not in done:
+                    request.cancel()
+                    return
+                hangup.cancel()
+                reply = request.result()
+            writer.write(json.dumps(reply).encode() + b"\n")
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self) -> None:
+        self._stopped = asyncio.Event()
+        os.makedirs(os.path.dirname(self.socket_path), mode=0o700, exist_ok=True)
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        await asyncio.to_thread(self.warm_up)
+        await self.get_llm(config_manager.get_prompt(), config_manager.get_set_openrouter_for_all()).awarm_up(
+            config_manager.get_default_model()
+        )
+
+        old_umask = os.umask(0o177)
+        try:
+            server = await asyncio.start_unix_server(self.handle_connection, path=self.socket_path)
+        finally:
+            os.umask(old_umask)
+
+        async with server:
+            await self._stopped.wait()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+def start_daemon() -> None:
+    """Starts the daemon as a detached background process."""
+    if not hasattr(socket, "AF_UNIX"):
+        print("❌ The tAI daemon needs Unix domain sockets, which this platform doesn't support.")
+        return
+    if client.is_running():
+        print(f"✅ tAI daemon is already running ({client.socket_path()})")
+        return
+    subprocess.Popen(
+        [sys.executable, "-m", "tAI.Daemon.server"],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    print(f"✅ tAI daemon started ({client.socket_path()})")
+
+
+def stop_daemon() -> None:
+    """Stops a running daemon."""
+    if client.stop():
+        print("✅ tAI daemon stopped")
+    else:
+        print("❌ tAI daemon is not running")
+
+
+if __name__ == "__main__":
+    asyncio.run(DaemonServer(client.socket_path()).serve())
@@ -1,25 +1,280 @@
-import time
+"""
+This module delivers the generated command to the terminal after the TUI exits.
+
+Several injection backends are tried in order of preference. The first one that
+is available on this system and succeeds wins, and typing the command with
+synthetic key presses (the slowest and most fragile path) is the last resort.
+
+Backends that type into the terminal window first wait for the TUI to hand the
+terminal back, i.e. for the TTY to leave raw mode, since keys arriving while it
+is still raw would be read by the TUI or lost. The wait is measured by polling
+the TTY's mode, so it ends as soon as the terminal is released and is capped by
+the backend's `max_settle`.
+"""
+import os
+import shutil
 import subprocess
-from pynput.keyboard import Controller, Key
+import sys
+import time
+from abc import ABC, abstractmethod
+from typing import List
+
+# How often the TTY's mode is checked while waiting for it to leave raw mode.
+SETTLE_POLL_INTERVAL = 0.005
+
+
+def wait_for_terminal(timeout: float) -> float:
+    """
+    Waits until the controlling TTY is back in canonical (line) mode.
+
+    Args:
+        timeout (float): The longest to wait, in seconds.
+
+    Returns:
+        The seconds waited. Without a controlling TTY there is no TUI to wait for.
+    """
+    if timeout <= 0:
+        return 0.0
+    started = time.monotonic()
+    try:
+        import termios
+
+        fd = os.open("/dev/tty", os.O_RDONLY | os.O_NOCTTY)
+    except (ImportError, OSError):
+        return 0.0
+    try:
+        while time.monotonic() - started < timeout:
+            if termios.tcgetattr(fd)[3] & termios.ICANON:
+                break
+            time.sleep(SETTLE_POLL_INTERVAL)
+    except termios.error:
+        pass
+    finally:
+        os.close(fd)
+    return time.monotonic() - started
+
+
+class InjectionBackend(ABC):
+    """Delivers a whole command to the terminal's input."""
+
+    name = ""
+    # The longest to wait for the TUI to release the terminal before injecting, in seconds.
+    max_settle = 0.0
+
+    @abstractmethod
+    def available(self) -> bool:
+        """Cheap capability check; `inject` may still fail, which triggers the next backend."""
+
+    @abstractmethod
+    def inject(self, command: str) -> None:
+        """Delivers the command."""
+
+    def settle(self) -> float:
+        """Waits until injected input would reach the shell. Returns the seconds waited."""
+        return wait_for_terminal(self.max_settle)
+
+
+class TiocstiBackend(InjectionBackend):
+    """
+    Pushes the command into the controlling TTY's input queue with the TIOCSTI ioctl.
+
+    The shell reads it as if it had been typed, without an X server or input device,
+    so it also works over SSH and inside tmux. Linux 6.2+ can disable it through the
+    dev.tty.legacy_tiocsti sysctl.
+    """
+
+    name = "tiocsti"
+    LEGACY_SYSCTL = "/proc/sys/dev/tty/legacy_tiocsti"
+
+    def available(self) -> bool:
+        if os.name != "posix":
+            return False
+        import termios
+        if not hasattr(termios, "TIOCSTI"):
+            return False
+        if os.path.exists(self.LEGACY_SYSCTL):
+            with open(self.LEGACY_SYSCTL) as f:
+                if f.read().strip() == "0":
+                    return False
+        return os.path.exists("/dev/tty")
+
+    def wrap(self, command: str) -> str:
+        return command
+
+    def inject(self, command: str) -> None:
+        import fcntl
+        import termios
+
+        data = self.wrap(command).encode()
+        fd = os.open("/dev/tty", os.O_RDWR | os.O_NOCTTY)
+        try:
+            for i in range(len(data)):
+                fcntl.ioctl(fd, termios.TIOCSTI, data[i:i + 1])
+        finally:
+            os.close(fd)
+
+
+class BracketedPasteBackend(TiocstiBackend):
+    """
+    TIOCSTI wrapped in bracketed-paste markers.
+
+    Shells with bracketed paste enabled (bash 5.1+, zsh 5.1+, fish) insert the whole
+    block literally, so newlines in multi-line commands don't execute anything.
+    """
+
+    name = "bracketed-paste"
+
+    def wrap(self, command: str) -> str:
+        return f"\x1b[200~{command}\x1b[201~"
+
+
+class XdotoolBackend(InjectionBackend):
+    """Types the command in one batched xdotool call under X11."""
+
+    name = "xdotool"
+    max_settle = 0.5
+
+    def available(self) -> bool:
+        return bool(os.environ.get("DISPLAY")) and shutil.which("xdotool") is not None
+
+    def inject(self, command: str) -> None:
+        subprocess.run(
+            ["xdotool", "type", "--clearmodifiers", "--delay", "0", "--file", "-"],
+            input=command.encode(),
+            check=True,
+            timeout=10,
+        )
+
+
+class YdotoolBackend(InjectionBackend):
+    """Types the command through uinput with ydotool, which also works under Wayland."""
+
+    name = "ydotool"
+    max_settle = 0.5
+
+    def available(self) -> bool:
+        return sys.platform.startswith("linux") and shutil.which("ydotool") is not None
+
+    def inject(self, command: str) -> None:
+        subprocess.run(
+            ["ydotool", "type", "--key-delay", "0", "--", command],
+            check=True,
+            timeout=10,
+        )
+
+
+class ClipboardPasteBackend(InjectionBackend):
+    """Copies the command to the clipboard and sends the terminal's paste shortcut."""
+
+    name = "clipboard"
+    max_settle = 0.5
+    COPY_COMMANDS = [
+        ["wl-copy"],
+        ["xclip", "-selection", "clipboard"],
+        ["xsel", "--clipboard", "--input"],
+        ["pbcopy"],
+    ]
+
+    def _copy_command(self):
+        for copy_command in self.COPY_COMMANDS:
+            if shutil.which(copy_command[0]):
+                return copy_command
+        return None
+
+    def available(self) -> bool:
+        if self._copy_command() is None:
+            return False
+        return sys.platform == "darwin" or bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+
+    def inject(self, command: str) -> None:
+        from pynput.keyboard import Controller, Key
+
+        subprocess.run(self._copy_command(), input=command.encode(), check=True, timeout=5)
+        keyboard = Controller()
+        # Terminals paste with Ctrl+Shift+V on Linux and Cmd+V on macOS.
+        modifiers = [Key.cmd] if sys.platform == "darwin" else [Key.ctrl, Key.shift]
+        with keyboard.pressed(*modifiers):
+            keyboard.tap("v")
+
+
+class KeystrokeBackend(InjectionBackend):
+    """
+    Types the command with synthetic key presses through pynput.
+
+    Instead of a fixed delay after every key, the command is typed in chunks with a
+    short pause in between, which keeps slow terminals from dropping characters
+    while the total time stays small.
+    """
+
+    name = "keystrokes"
+    max_settle = 1.0
+    CHUNK_SIZE = 32
+    CHUNK_PAUSE = 0.005
+
+    def available(self) -> bool:
+        return True
+
+    def controller(self):
+        from pynput.keyboard import Controller
+
+        return Controller()
+
+    def inject(self, command: str) -> None:
+        keyboard = self.controller()
+        for start in range(0, len(command), self.CHUNK_SIZE):
+            keyboard.type(command[start:start + self.CHUNK_SIZE])
+            time.sleep(self.CHUNK_PAUSE)
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (
+        TiocstiBackend,
+        BracketedPasteBackend,
+        XdotoolBackend,
+        YdotoolBackend,
+        ClipboardPasteBackend,
+        KeystrokeBackend,
+    )
+}
+
+# Bracketed paste is opt-in because shells without support would show the markers.
+AUTO_ORDER = ["tiocsti", "xdotool", "ydotool", "clipboard", "keystrokes"]
+
+
+def select_backends(preferred: str = "auto") -> List[InjectionBackend]:
+    """
+    Returns the backends to try, most preferred first.
+
+    Args:
+        preferred (str): "auto", or a backend name to try before the automatic order.
+    """
+    order = list(AUTO_ORDER)
+    if preferred in BACKENDS:
+        order = [preferred] + [name for name in order if name != preferred]
+    return [BACKENDS[name]() for name in order]
+
 
 class Automate():
-    def __init__(self):
+    def __init__(self, backend: str = "auto"):
         self.command = None
-        self.keyboard = Controller()
+        self.backends = select_backends(backend)
+        self.last_backend = None
+        self.last_settle = 0.0
 
     def paste_command_to_terminal(self, command: str) -> None:
-        """Paste command to terminal using xdotool after TUI exits."""
-        try:
-            time.sleep(1)
-            # Type the command
-            for char in command:
-                self.keyboard.press(char)
-                self.keyboard.release(char)
-                # Add a small delay between key presses for realism (optional)
-                time.sleep(0.04)
-        except subprocess.CalledProcessError as e:
-            print(f"❌ Error pasting command: {e}")
-            print(f"💡 Manual copy: {command}")
-        except FileNotFoundError:
-            print("❌ pynput not found. Please install: pip install pynput")
-            print(f"💡 Manual copy: {command}")
\ No newline at end of file
+        """Paste command to the terminal with the first injection backend that works."""
+        errors = []
+        for backend in self.backends:
+            try:
+                if not backend.available():
+                    continue
+                self.last_settle = backend.settle()
+                backend.inject(command)
+                self.last_backend = backend.name
+                return
+            except Exception as e:
+                errors.append(f"{backend.name}: {e}")
+
+        print(f"❌ Error pasting command: {'; '.join(errors) or 'no injection backend available'}")
+        print(f"💡 Manual copy: {command}")
@@ -1,38 +1,341 @@
-from litellm import completion
-import litellm
-import json
-from pydantic import BaseModel
-from tAI.Utils.API import get_api_key
-litellm.enable_json_schema_validation = True
+import asyncio
+import time
+from typing import Callable, Optional
+from tAI.LLM.backends import Backend, get_backend
+from tAI.LLM.cache import get_cache
+from tAI.LLM.catalog import get_catalog
+from tAI.LLM.decoding import DecodedCommand, decode_command, rejects_structured_output
+from tAI.LLM.health import get_health
+from tAI.LLM.race import RACE_MODEL_ID, arace, race
+from tAI.LLM.router import get_router
+from tAI.LLM.result import GenerationResult
+from tAI.LLM.streaming import CommandStreamParser
+from tAI.Utils import metrics
+from tAI.Utils.API import get_api_key, is_local_model
+from tAI.Utils.config_manager import config_manager
+
+# The `{"command": ...}` object models are asked to reply with, as an OpenAI response format.
+COMMAND_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "Command",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {"command": {"type": "string"}},
+            "required": ["command"],
+            "additionalProperties": False,
+        },
+    },
+}
 
 
 class llm:
-    def __init__(self, prompt: str, openrouter_all: bool):
+    def __init__(self, prompt: str, openrouter_all: bool, use_cache: bool = True, backend: Optional[Backend] = None):
         self.prompt = prompt
         self.openrouter_all = openrouter_all
+        self.use_cache = use_cache
+        # The configured backend by default; creating it imports its HTTP library.
+        self.backend = backend or get_backend()
 
-    class Command(BaseModel):
-        command: str
-    
     def generate_command(self, model: str, query: str) -> str:
-        messages = [
-            {"role": "system", "content": self.prompt},
-            {"role": "user", "content": query},
-        ]
-        if self.openrouter_all:
-
-            # only changing when there is no openrouter before
-            if not (model.startswith("openrouter/")):
-                model = "openrouter/" + model
-            api_key = get_api_key(model, self.openrouter_all)
-        else:
-            api_key = get_api_key(model,False)
-        response = completion(
-            model=model,
-            messages=messages,
-            api_key=api_key,
-            response_format=self.Command,
+        return self.generate(model, query).command
+
+    def generate(self, model: str, query: str) -> GenerationResult:
+        """Generates a command, answering from the response cache when possible."""
+        cached = self._cache_lookup(model, query)
+        if cached is not None:
+            return cached
+
+        if model == RACE_MODEL_ID:
+            winner, command = race(
+                config_manager.get_race_models(),
+                lambda race_model: self._complete(race_model, query),
+                config_manager.get_race_hedge_delay(),
+            )
+            self._cache_store(model, query, command)
+            return GenerationResult(command=command, model=winner)
+
+        answered_by, command = get_router().run(model, lambda candidate: self._complete(candidate, query))
+        self._cache_store(model, query, command)
+        return GenerationResult(command=command, model=answered_by)
+
+    def stream(self, model: str, query: str, on_partial: Callable[[str], None]) -> GenerationResult:
+        """
+        Generates a command with a streamed response.
+
+        `on_partial` is called with the command decoded so far whenever it grows.
+        The stream is closed as soon as the command string is complete, so any
+        trailing tokens are never waited on.
+        """
+        cached = self._cache_lookup(model, query)
+        if cached is not None:
+            on_partial(cached.command)
+            return cached
+        if model == RACE_MODEL_ID:
+            # Racing needs complete answers to pick a winner, so there is nothing to stream.
+            result = self.generate(model, query)
+            on_partial(result.command)
+            return result
+
+        def attempt(candidate: str) -> str:
+            shown = []
+            try:
+                return self._stream(candidate, query, lambda partial: (shown.append(partial), on_partial(partial)))
+            except Exception:
+                if shown:
+                    # The next model starts from scratch, so take this one's half-written command off the screen.
+                    on_partial("")
+                raise
+
+        answered_by, command = get_router().run(model, attempt)
+        self._cache_store(model, query, command)
+        return GenerationResult(command=command, model=answered_by)
+
+    def _stream(self, model: str, query: str, on_partial: Callable[[str], None]) -> str:
+        request_model, kwargs = self._build_request(model, query)
+        started = time.perf_counter()
+        response = self._completion(model, request_model, kwargs, stream=True)
+        parser = CommandStreamParser()
+        first_chunk = True
+        try:
+            for delta in response:
+                if first_chunk:
+                    metrics.record("network_ttfb", time.perf_counter() - started, model=model)
+                    first_chunk = False
+                if self._feed_delta(parser, delta, on_partial):
+                    break
+        finally:
+            # Closing the stream keeps the connection from downloading any trailing tokens.
+            response.close()
+            metrics.record("network_total", time.perf_counter() - started, model=model)
+
+        with metrics.span("parse", model=model):
+            return self._stream_result(model, parser, "response_format" in kwargs)
+
+    async def agenerate(self, model: str, query: str, fallback: bool = True) -> GenerationResult:
+        """
+        Async variant of `generate` built on the backend's async calls.
+
+        Cancelling the awaiting task aborts the in-flight HTTP request instead of
+        leaving it running in a thread. With `fallback` off, a failure of the
+        model is raised instead of trying the fallback models. The cache, the
+        health store and key decryption are blocking, so they run in a thread to
+        keep the event loop free for the UI and other requests.
+        """
+        cached = await asyncio.to_thread(self._cache_lookup, model, query)
+        if cached is not None:
+            return cached
+
+        if model == RACE_MODEL_ID:
+            winner, command = await arace(
+                config_manager.get_race_models(),
+                lambda race_model: self._acomplete(race_model, query),
+                config_manager.get_race_hedge_delay(),
+            )
+            await asyncio.to_thread(self._cache_store, model, query, command)
+            return GenerationResult(command=command, model=winner)
+
+        answered_by, command = await get_router().arun(
+            model, lambda candidate: self._acomplete(candidate, query), fallback
         )
-        response_json = json.loads(response.model_dump()['choices'][0]['message']['content'])
-        command = response_json['command']
-        return command
\ No newline at end of file
+        await asyncio.to_thread(self._cache_store, model, query, command)
+        return GenerationResult(command=command, model=answered_by)
+
+    async def astream(self, model: str, query: str, on_partial: Callable[[str], None]) -> GenerationResult:
+        """Async variant of `stream`; `on_partial` is called on the event loop."""
+        cached = await asyncio.to_thread(self._cache_lookup, model, query)
+        if cached is not None:
+            on_partial(cached.command)
+            return cached
+        if model == RACE_MODEL_ID:
+            result = await self.agenerate(model, query)
+            on_partial(result.command)
+            return result
+
+        async def attempt(candidate: str) -> str:
+            shown = []
+            try:
+                return await self._astream(candidate, query, lambda partial: (shown.append(partial), on_partial(partial)))
+            except Exception:
+                if shown:
+                    on_partial("")
+                raise
+
+        answered_by, command = await get_router().arun(model, attempt)
+        await asyncio.to_thread(self._cache_store, model, query, command)
+        return GenerationResult(command=command, model=answered_by)
+
+    async def _astream(self, model: str, query: str, on_partial: Callable[[str], None]) -> str:
+        request_model, kwargs = await asyncio.to_thread(self._build_request, model, query)
+        started = time.perf_counter()
+        response = await self._acompletion(model, request_model, kwargs, stream=True)
+        parser = CommandStreamParser()
+        first_chunk = True
+        try:
+            async for delta in response:
+                if first_chunk:
+                    metrics.record("network_ttfb", time.perf_counter() - started, model=model)
+                    first_chunk = False
+                if self._feed_delta(parser, delta, on_partial):
+                    break
+        finally:
+            await response.aclose()
+            metrics.record("network_total", time.perf_counter() - started, model=model)
+
+        with metrics.span("parse", model=model):
+            return await asyncio.to_thread(self._stream_result, model, parser, "response_format" in kwargs)
+
+    async def awarm_up(self, model: str) -> None:
+        """
+        Sends a one-token request to a local model so the server loads it before the first real query.
+
+        Remote models are left alone: they are always loaded and the request would cost tokens.
+        Failures are ignored, the real request will report them.
+        """
+        if not is_local_model(model):
+            return
+        request_model, kwargs = await asyncio.to_thread(self._build_request, model, "ping")
+        kwargs.pop("response_format", None)
+        kwargs["messages"] = kwargs["messages"][1:]
+        kwargs["max_tokens"] = 1
+        try:
+            with metrics.span("warm_up", model=model):
+                await self.backend.acomplete(request_model, kwargs)
+        except Exception:
+            pass
+
+    def _cache_lookup(self, model: str, query: str) -> Optional[GenerationResult]:
+        if not self.use_cache:
+            return None
+        command = get_cache().get(model, self.prompt, self.openrouter_all, query)
+        if command is None:
+            return None
+        return GenerationResult(command=command, model=model, source="cache")
+
+    def _cache_store(self, model: str, query: str, command: str) -> None:
+        if self.use_cache:
+            get_cache().put(model, self.prompt, self.openrouter_all, query, command)
+
+    def _build_request(self, model: str, query: str):
+        """Returns the model id to call and the request for the backend (see tAI.LLM.backends)."""
+        requested_model = model
+        with metrics.span("request_build", model=model):
+            messages = [
+                {"role": "system", "content": self.prompt},
+                {"role": "user", "content": query},
+            ]
+            extra = {}
+            if is_local_model(model):
+                # Local servers speak the OpenAI API, so they are called like OpenAI at their own URL.
+                api_key = get_api_key(model, False)
+                extra["api_base"] = config_manager.get_local_base_url()
+                model = "openai/" + model.split("/", 1)[1]
+            elif self.openrouter_all:
+
+                # only changing when there is no openrouter before
+                if not (model.startswith("openrouter/")):
+                    model = "openrouter/" + model
+                api_key = get_api_key(model, self.openrouter_all)
+            else:
+                api_key = get_api_key(model,False)
+            if self._marks_prompt_cache(model):
+                messages[0]["content"] = [
+                    {"type": "text", "text": self.prompt, "cache_control": {"type": "ephemeral"}},
+                ]
+            if self._supports_structured_output(requested_model) is not False:
+                # Models known to ignore or reject the schema are asked without it.
+                extra["response_format"] = COMMAND_FORMAT
+        return model, {
+            "messages": messages,
+            "api_key": api_key,
+            "timeout": config_manager.get_router_timeout(),
+            **extra,
+        }
+
+    @staticmethod
+    def _supports_structured_output(model: str) -> Optional[bool]:
+        """What tAI has observed about a model's structured output, else what the catalog says."""
+        observed = get_health().structured_output(model)
+        if observed is not None:
+            return observed
+        info = get_catalog().get(model)
+        return info.structured_output if info is not None else None
+
+    @staticmethod
+    def _marks_prompt_cache(model: str) -> bool:
+        """
+        Whether the system prompt has to be marked for the provider to cache it.
+
+        Anthropic (directly or through OpenRouter) only caches prefixes marked with
+        cache_control. OpenAI and Gemini cache repeated prefixes automatically, which
+        works because the system prompt always comes first and never changes between
+        requests; only the user message at the end does.
+        """
+        return model.startswith("anthropic/") or model.startswith("openrouter/anthropic/")
+
+    def _complete(self, model: str, query: str) -> str:
+        request_model, kwargs = self._build_request(model, query)
+        with metrics.span("network_total", model=model):
+            content = self._completion(model, request_model, kwargs)
+        with metrics.span("parse", model=model):
+            return self._decoded(model, decode_command(content), "response_format" in kwargs)
+
+    async def _acomplete(self, model: str, query: str) -> str:
+        request_model, kwargs = await asyncio.to_thread(self._build_request, model, query)
+        with metrics.span("network_total", model=model):
+            content = await self._acompletion(model, request_model, kwargs)
+        with metrics.span("parse", model=model):
+            decoded = decode_command(content)
+            return await asyncio.to_thread(self._decoded, model, decoded, "response_format" in kwargs)
+
+    def _completion(self, model: str, request_model: str, kwargs: dict, stream: bool = False):
+        """
+        Sends the request through the backend, asking again without `response_format` if the model rejects it.
+
+        The rejection is remembered, so later requests to the model skip the schema.
+        `kwargs` is updated in place, so the caller knows what was sent.
+        """
+        call = self.backend.stream if stream else self.backend.complete
+        try:
+            return call(request_model, kwargs)
+        except Exception as e:
+            if "response_format" not in kwargs or not rejects_structured_output(e):
+                raise
+        get_health().set_structured_output(model, False)
+        del kwargs["response_format"]
+        return call(request_model, kwargs)
+
+    async def _acompletion(self, model: str, request_model: str, kwargs: dict, stream: bool = False):
+        """Async variant of `_completion`."""
+        call = self.backend.astream if stream else self.backend.acomplete
+        try:
+            return await call(request_model, kwargs)
+        except Exception as e:
+            if "response_format" not in kwargs or not rejects_structured_output(e):
+                raise
+        await asyncio.to_thread(get_health().set_structured_output, model, False)
+        del kwargs["response_format"]
+        return await call(request_model, kwargs)
+
+    @staticmethod
+    def _decoded(model: str, decoded: DecodedCommand, asked_structured: bool) -> str:
+        """Records whether a model honoured `response_format` and returns the command."""
+        if asked_structured:
+            health = get_health()
+            if health.structured_output(model) != decoded.structured:
+                health.set_structured_output(model, decoded.structured)
+        return decoded.command
+
+    def _stream_result(self, model: str, parser: CommandStreamParser, asked_structured: bool) -> str:
+        """Returns the streamed command, decoding the whole reply if it wasn't the requested JSON."""
+        return self._decoded(model, parser.result(), asked_structured)
+
+    @staticmethod
+    def _feed_delta(parser: CommandStreamParser, delta: str, on_partial: Callable[[str], None]) -> bool:
+        """Feeds one streamed piece of content to the parser. Returns True once the command is complete."""
+        before = parser.value
+        partial = parser.feed(delta)
+        if partial != before:
+            on_partial(partial)
+        return parser.complete
@@ -0,0 +1,476 @@
+"""
+This module sends chat requests to the model providers.
+
+tAI makes one kind of call: a system prompt and a request in, one short reply
+(ideally `{"command": ...}`) out, streamed or not. A `Backend` does exactly
+that and nothing more, so the provider library behind it can be swapped:
+
+- `HttpBackend` (the default, `llm_backend: "http"`) talks to the providers'
+  HTTP APIs directly over one pooled httpx client: the OpenAI chat completions
+  API for OpenAI, OpenRouter, Gemini (through its OpenAI-compatible endpoint)
+  and local servers, and the Messages API for Anthropic.
+- `LitellmBackend` (`llm_backend: "litellm"`) goes through litellm, which is an
+  optional extra (`pip install "tai-textual[litellm]"`) that costs hundreds of
+  MB and seconds of import time, but supports every provider litellm knows.
+
+A request is the keyword arguments `llm._build_request` builds: `messages`,
+`api_key`, `timeout`, and optionally `api_base`, `response_format` (an OpenAI
+`json_schema` format) and `max_tokens`. Backends return the reply's message
+content, or a stream of content deltas, and leave decoding to the caller.
+"""
+import asyncio
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterator, Optional, Tuple
+
+import httpx
+
+HTTP = "http"
+LITELLM = "litellm"
+
+# Commands are one line or a few; a reply this long means the model went off the rails.
+DEFAULT_MAX_TOKENS = 1024
+ANTHROPIC_VERSION = "2023-06-01"
+
+
+class ProviderError(Exception):
+    """An error response from a provider. Carries the status code and the response, like the SDKs' errors."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, response: Optional[httpx.Response] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.response = response
+
+
+class ChatStream:
+    """The content deltas of a streamed reply. `close` stops the download."""
+
+    def __init__(self, deltas: Iterator[str], close: Callable[[], None]):
+        self._deltas = deltas
+        self._close = close
+
+    def __iter__(self) -> Iterator[str]:
+        return self._deltas
+
+    def close(self) -> None:
+        try:
+            self._close()
+        except Exception:
+            pass
+
+
+class AsyncChatStream:
+    """Async variant of `ChatStream`."""
+
+    def __init__(self, deltas: AsyncIterator[str], close: Callable[[], Awaitable[None]]):
+        self._deltas = deltas
+        self._close = close
+
+    def __aiter__(self) -> AsyncIterator[str]:
+        return self._deltas
+
+    async def aclose(self) -> None:
+        try:
+            await self._close()
+        except Exception:
+            pass
+
+
+class Backend(ABC):
+    """Sends one chat request to a model. `model` is a provider-prefixed id, e.g. "openai/gpt-4o-mini"."""
+
+    name = ""
+
+    @abstractmethod
+    def complete(self, model: str, request: dict) -> Optional[str]:
+        """Returns the message content of the reply."""
+
+    @abstractmethod
+    async def acomplete(self, model: str, request: dict) -> Optional[str]:
+        """Async variant of `complete`."""
+
+    @abstractmethod
+    def stream(self, model: str, request: dict) -> ChatStream:
+        """Sends the request and returns the reply as it arrives. Errors the provider answers with are raised here."""
+
+    @abstractmethod
+    async def astream(self, model: str, request: dict) -> AsyncChatStream:
+        """Async variant of `stream`."""
+
+
+_client: Optional[httpx.Client] = None
+_client_lock = threading.Lock()
+_async_client: Optional[httpx.AsyncClient] = None
+_async_client_loop: Optional[asyncio.AbstractEventLoop] = None
+_async_client_closer: Optional[asyncio.Task] = None
+
+_TIMEOUT = httpx.Timeout(120, connect=10)
+_LIMITS = httpx.Limits(max_keepalive_connections=10, keepalive_expiry=300)
+
+
+def shared_client() -> httpx.Client:
+    """Returns the process-wide HTTP client, so requests reuse warm connections."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = httpx.Client(timeout=_TIMEOUT, limits=_LIMITS)
+        return _client
+
+
+async def _close_with_loop(client: httpx.AsyncClient) -> None:
+    """Waits until cancelled, then closes the client on its own loop."""
+    try:
+        await asyncio.get_running_loop().create_future()
+    finally:
+        await client.aclose()
+
+
+def shared_async_client() -> httpx.AsyncClient:
+    """
+    Returns the long-lived async HTTP client.
+
+    Connections are bound to the event loop they were opened on, so one client is
+    kept per running loop. Each client is closed by a task on its loop: asyncio.run
+    cancels it when the loop shuts down, and a client replaced for a newer loop has
+    it cancelled right away if its loop is still open.
+    """
+    global _async_client, _async_client_loop, _async_client_closer
+    loop = asyncio.get_running_loop()
+    if _async_client is None or _async_client_loop is not loop:
+        if _async_client_closer is not None and not _async_client_loop.is_closed():
+            _async_client_loop.call_soon_threadsafe(_async_client_closer.cancel)
+        _async_client = httpx.AsyncClient(timeout=_TIMEOUT, limits=_LIMITS)
+        _async_client_loop = loop
+        _async_client_closer = loop.create_task(_close_with_loop(_async_client))
+    return _async_client
+
+
+def _error_message(response: httpx.Response) -> str:
+    try:
+        payload = response.json()
+    except ValueError:
+        return response.text[:500] or response.reason_phrase
+    if isinstance(payload, list) and payload:
+        # Gemini wraps its errors in a list.
+        payload = payload[0]
+    error = payload.get("error") if isinstance(payload, dict) else None
+    if isinstance(error, dict) and error.get("message"):
+        return error["message"]
+    return json.dumps(payload)[:500]
+
+
+def _check(response: httpx.Response, provider: str) -> None:
+    """Raises a ProviderError for an error response. A streamed response has to be read first."""
+    if response.is_success:
+        return
+    raise ProviderError(f"{provider} returned {response.status_code}: {_error_message(response)}", response.status_code, response)
+
+
+@contextmanager
+def _translated_errors():
+    """Raises httpx's timeouts as TimeoutError, which the router counts as timeouts."""
+    try:
+        yield
+    except httpx.TimeoutException as e:
+        raise TimeoutError(f"The request timed out ({type(e).__name__})") from e
+
+
+def _events(lines: Iterator[str]) -> Iterator[dict]:
+    """Parses the `data:` lines of a server-sent event stream."""
+    for line in lines:
+        if not line.startswith("data:"):
+            # Blank separators, `event:` names and keep-alive comments.
+            continue
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return
+        if data:
+            yield json.loads(data)
+
+
+async def _aevents(lines: AsyncIterator[str]) -> AsyncIterator[dict]:
+    async for line in lines:
+        if not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return
+        if data:
+            yield json.loads(data)
+
+
+def _event_error(event: dict, provider: str) -> None:
+    """Raises errors reported inside a stream, after the 200 status was sent."""
+    error = event.get("error")
+    if error is not None:
+        message = error.get("message", error) if isinstance(error, dict) else error
+        code = error.get("code") if isinstance(error, dict) else None
+        raise ProviderError(f"{provider} stream failed: {message}", code if isinstance(code, int) else None)
+
+
+class OpenAIChat:
+    """The OpenAI chat completions API, which OpenRouter, Gemini and local servers speak too."""
+
+    @staticmethod
+    def url(base_url: str) -> str:
+        return base_url.rstrip("/") + "/chat/completions"
+
+    @staticmethod
+    def headers(api_key: str) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {api_key}"}
+
+    @staticmethod
+    def body(model: str, request: dict, stream: bool) -> dict:
+        body = {"model": model, "messages": request["messages"]}
+        if "response_format" in request:
+            body["response_format"] = request["response_format"]
+        if "max_tokens" in request:
+            body["max_tokens"] = request["max_tokens"]
+        if stream:
+            body["stream"] = True
+        return body
+
+    @staticmethod
+    def content(payload: dict) -> Optional[str]:
+        choices = payload.get("choices")
+        return choices[0]["message"].get("content") if choices else None
+
+    @staticmethod
+    def delta(event: dict) -> Optional[str]:
+        choices = event.get("choices")
+        return choices[0].get("delta", {}).get("content") if choices else None
+
+
+class AnthropicMessages:
+    """
+    Anthropic's Messages API.
+
+    The system prompt is a top-level field, and structured output is a forced
+    call of a `command` tool whose input is the command object; its JSON is
+    returned as the content, so decoding works as for the other providers.
+    """
+
+    @staticmethod
+    def url(base_url: str) -> str:
+        return base_url.rstrip("/") + "/messages"
+
+    @staticmethod
+    def headers(api_key: str) -> Dict[str, str]:
+        return {"x-api-key": api_key, "anthropic-version": ANTHROPIC_VERSION}
+
+    @staticmethod
+    def body(model: str, request: dict, stream: bool) -> dict:
+        system = [message["content"] for message in request["messages"] if message["role"] == "system"]
+        body = {
+            "model": model,
+            "max_tokens": request.get("max_tokens", DEFAULT_MAX_TOKENS),
+            "messages": [message for message in request["messages"] if message["role"] != "system"],
+        }
+        if system:
+            body["system"] = system[0]
+        response_format = request.get("response_format")
+        if response_format is not None:
+            schema = response_format["json_schema"]
+            body["tools"] = [{"name": "command", "description": "Returns the shell command.", "input_schema": schema["schema"]}]
+            body["tool_choice"] = {"type": "tool", "name": "command"}
+        if stream:
+            body["stream"] = True
+        return body
+
+    @staticmethod
+    def content(payload: dict) -> Optional[str]:
+        text = []
+        for block in payload.get("content", []):
+            if block.get("type") == "tool_use":
+                return json.dumps(block.get("input", {}))
+            if block.get("type") == "text":
+                text.append(block.get("text", ""))
+        return "".join(text) or None
+
+    @staticmethod
+    def delta(event: dict) -> Optional[str]:
+        if event.get("type") != "content_block_delta":
+            return None
+        delta = event.get("delta", {})
+        return delta.get("text") or delta.get("partial_json")
+
+
+# Model id prefix -> (default API base URL, API). `<PREFIX>_API_BASE` in the environment overrides the URL.
+ENDPOINTS: Dict[str, Tuple[str, type]] = {
+    "openai": ("https://api.openai.com/v1", OpenAIChat),
+    "openrouter": ("https://openrouter.ai/api/v1", OpenAIChat),
+    "gemini": ("https://generativelanguage.googleapis.com/v1beta/openai", OpenAIChat),
+    "anthropic": ("https://api.anthropic.com/v1", AnthropicMessages),
+}
+
+
+class HttpBackend(Backend):
+    """Calls the providers' HTTP APIs directly; see the module docstring."""
+
+    name = HTTP
+
+    @staticmethod
+    def _prepare(model: str, request: dict, stream: bool) -> Tuple[str, type, httpx.Request]:
+        provider, _, name = model.partition("/")
+        if provider not in ENDPOINTS:
+            raise Exception(f'The "http" backend doesn\'t support {provider} models; set llm_backend to "litellm"')
+        default_url, api = ENDPOINTS[provider]
+        base_url = request.get("api_base") or os.getenv(f"{provider.upper()}_API_BASE") or default_url
+        timeout = request.get("timeout")
+        http_request = httpx.Request(
+            "POST",
+            api.url(base_url),
+            json=api.body(name, request, stream),
+            headers=api.headers(request["api_key"]),
+            extensions={"timeout": (httpx.Timeout(timeout, connect=10) if timeout else _TIMEOUT).as_dict()},
+        )
+        return provider, api, http_request
+
+    def complete(self, model: str, request: dict) -> Optional[str]:
+        provider, api, http_request = self._prepare(model, request, stream=False)
+        with _translated_errors():
+            response = shared_client().send(http_request)
+        _check(response, provider)
+        return api.content(response.json())
+
+    async def acomplete(self, model: str, request: dict) -> Optional[str]:
+        provider, api, http_request = self._prepare(model, request, stream=False)
+        with _translated_errors():
+            response = await shared_async_client().send(http_request)
+        _check(response, provider)
+        return api.content(response.json())
+
+    def stream(self, model: str, request: dict) -> ChatStream:
+        provider, api, http_request = self._prepare(model, request, stream=True)
+        with _translated_errors():
+            response = shared_client().send(http_request, stream=True)
+            if not response.is_success:
+                response.read()
+                response.close()
+                _check(response, provider)
+
+        def deltas() -> Iterator[str]:
+            with _translated_errors():
+                for event in _events(response.iter_lines()):
+                    _event_error(event, provider)
+                    delta = api.delta(event)
+                    if delta:
+                        yield delta
+
+        return ChatStream(deltas(), response.close)
+
+    async def astream(self, model: str, request: dict) -> AsyncChatStream:
+        provider, api, http_request = self._prepare(model, request, stream=True)
+        with _translated_errors():
+            response = await shared_async_client().send(http_request, stream=True)
+            if not response.is_success:
+                await response.aread()
+                await response.aclose()
+                _check(response, provider)
+
+        async def deltas() -> AsyncIterator[str]:
+            with _translated_errors():
+                async for event in _aevents(response.aiter_lines()):
+                    _event_error(event, provider)
+                    delta = api.delta(event)
+                    if delta:
+                        yield delta
+
+        return AsyncChatStream(deltas(), response.aclose)
+
+
+class LitellmBackend(Backend):
+    """Calls the providers through litellm."""
+
+    name = LITELLM
+
+    def __init__(self):
+        try:
+            import litellm
+        except ImportError as e:
+            raise Exception('llm_backend is "litellm", but litellm is not installed. Run: pip install "tai-textual[litellm]"') from e
+        # Keep litellm from printing help banners to stdout, which headless modes write their output to.
+        litellm.suppress_debug_info = True
+        self.litellm = litellm
+
+    def _async_session(self) -> None:
+        # litellm's async calls reuse the per-loop client through `aclient_session`.
+        self.litellm.aclient_session = shared_async_client()
+
+    @staticmethod
+    def _content(response) -> Optional[str]:
+        choices = getattr(response, "choices", None)
+        return choices[0].message.content if choices else None
+
+    @staticmethod
+    def _deltas(chunks) -> Iterator[str]:
+        for chunk in chunks:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                yield delta
+
+    @staticmethod
+    async def _adeltas(chunks) -> AsyncIterator[str]:
+        async for chunk in chunks:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                yield delta
+
+    def complete(self, model: str, request: dict) -> Optional[str]:
+        return self._content(self.litellm.completion(model=model, **request))
+
+    async def acomplete(self, model: str, request: dict) -> Optional[str]:
+        self._async_session()
+        return self._content(await self.litellm.acompletion(model=model, **request))
+
+    def stream(self, model: str, request: dict) -> ChatStream:
+        response = self.litellm.completion(model=model, stream=True, **request)
+        # Closing the provider stream keeps the connection from downloading the rest of the reply.
+        stream = getattr(response, "completion_stream", response)
+        return ChatStream(self._deltas(response), getattr(stream, "close", lambda: None))
+
+    async def astream(self, model: str, request: dict) -> AsyncChatStream:
+        self._async_session()
+        response = await self.litellm.acompletion(model=model, stream=True, **request)
+        stream = getattr(response, "completion_stream", response)
+
+        async def close() -> None:
+            close = getattr(stream, "aclose", None) or getattr(stream, "close", None)
+            if callable(close):
+                result = close()
+                if asyncio.iscoroutine(result):
+                    await result
+
+        return AsyncChatStream(self._adeltas(response), close)
+
+
+BACKENDS: Dict[str, Callable[[], Backend]] = {HTTP: HttpBackend, LITELLM: LitellmBackend}
+
+_backend: Optional[Backend] = None
+_backend_lock = threading.Lock()
+
+
+def make_backend(name: str) -> Backend:
+    """
+    Creates a backend by name.
+
+    Args:
+        name (str): "http" or "litellm".
+    """
+    if name not in BACKENDS:
+        raise Exception(f"Unknown llm_backend: {name} (expected one of: {', '.join(BACKENDS)})")
+    return BACKENDS[name]()
+
+
+def get_backend() -> Backend:
+    """Returns the backend configured by `llm_backend` in config.json, created once per process."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            from tAI.Utils.config_manager import config_manager
+
+            _backend = make_backend(config_manager.get_llm_backend())
+        return _backend
@@ -0,0 +1,158 @@
+"""
+This module generates commands for many queries concurrently.
+
+Requests run with bounded concurrency, every provider gets its own request rate
+limit, and a rate-limited (HTTP 429) request is retried with exponential backoff
+that also pauses the other requests to the same provider. A request only holds
+one of the concurrency slots while it is sent, never while it waits for its
+provider's limit or backoff, so a throttled provider can't hold up the others. The limit applies to
+the provider a request is actually sent to, so requests are made without the
+router's fallback chain ("auto" is resolved to one model first), and queries
+answered offline never take a slot. Results are yielded in completion order,
+tagged with the index of their input.
+"""
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from tAI.LLM.health import is_rate_limit_error, retry_after
+from tAI.LLM.race import RACE_MODEL_ID
+from tAI.LLM.result import GenerationResult
+from tAI.Utils.API import provider_for
+
+
+@dataclass
+class BatchItem:
+    """One query of a batch and the model to ask."""
+    index: int
+    query: str
+    model: str
+
+
+@dataclass
+class BatchResult:
+    """The outcome of one batch item: a result, or the error that ended its retries."""
+    item: BatchItem
+    result: Optional[GenerationResult] = None
+    error: Optional[str] = None
+    attempts: int = 1
+    seconds: float = 0.0
+
+
+class RateLimiter:
+    """
+    Spaces out requests to one provider to at most `per_minute` starts per minute.
+
+    `pause` pushes the next allowed start back, which is how a 429 slows down
+    every request to that provider and not just the one that was rejected.
+    """
+
+    def __init__(self, per_minute: Optional[float] = None):
+        self.interval = 60 / per_minute if per_minute else 0
+        self._next_start = 0.0
+
+    async def wait(self) -> None:
+        """Sleeps until a request may start; the start still has to be claimed with `try_start`."""
+        while (delay := self._next_start - time.monotonic()) > 0:
+            await asyncio.sleep(delay)
+
+    def try_start(self) -> bool:
+        """Claims the next start if it is due. Returns False if another request claimed it first."""
+        now = time.monotonic()
+        if now < self._next_start:
+            return False
+        self._next_start = now + self.interval
+        return True
+
+    def pause(self, seconds: float) -> None:
+        self._next_start = max(self._next_start, time.monotonic() + seconds)
+
+
+def provider_key(model: str, openrouter_all: bool) -> str:
+    """Returns the name of the provider whose rate limit applies to a model."""
+    if openrouter_all:
+        return "openrouter"
+    if model == RACE_MODEL_ID:
+        return RACE_MODEL_ID
+    try:
+        return provider_for(model).name
+    except Exception:
+        return model.split("/", 1)[0]
+
+
+async def run_batch(
+    items: List[BatchItem],
+    generate: Callable[[str, str], Awaitable[GenerationResult]],
+    openrouter_all: bool = False,
+    concurrency: int = 8,
+    rate_limits: Optional[Dict[str, float]] = None,
+    max_retries: int = 3,
+    backoff: float = 1.0,
+    answer_offline: Optional[Callable[[str], Optional[GenerationResult]]] = None,
+    resolve: Optional[Callable[[str], str]] = None,
+) -> AsyncIterator[BatchResult]:
+    """
+    Generates a command for every item and yields the results as they complete.
+
+    Args:
+        items (list): The batch items.
+        generate (callable): Async function generating a command for (model, query) with that
+            one model, without falling back to others.
+        openrouter_all (bool): Whether every model is routed through OpenRouter.
+        concurrency (int): How many requests may be in flight at once.
+        rate_limits (dict): Requests per minute per provider name; missing providers are unlimited.
+        max_retries (int): How often a rate-limited request is retried.
+        backoff (float): Delay in seconds before the first retry; it doubles every retry.
+        answer_offline (callable): Returns a result for a query without a request (instant
+            answers), or None. Checked before any rate limit is waited for.
+        resolve (callable): Maps a requested model to the one that will be called, e.g.
+            "auto" to the fastest healthy model. Called again for every retry.
+    """
+    rate_limits = rate_limits or {}
+    limiters: Dict[str, RateLimiter] = {}
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    def limiter_for(model: str) -> RateLimiter:
+        key = provider_key(model, openrouter_all)
+        if key not in limiters:
+            limiters[key] = RateLimiter(rate_limits.get(key))
+        return limiters[key]
+
+    async def send(limiter: RateLimiter, model: str, query: str) -> GenerationResult:
+        """Waits for the provider's limit without a slot, then holds a slot for the request only."""
+        while True:
+            await limiter.wait()
+            async with semaphore:
+                if limiter.try_start():
+                    return await generate(model, query)
+
+    async def run_one(item: BatchItem) -> BatchResult:
+        started = time.perf_counter()
+        if answer_offline is not None:
+            result = answer_offline(item.query)
+            if result is not None:
+                return BatchResult(item, result=result, seconds=time.perf_counter() - started)
+        attempt = 0
+        while True:
+            attempt += 1
+            model = resolve(item.model) if resolve is not None else item.model
+            limiter = limiter_for(model)
+            try:
+                result = await send(limiter, model, item.query)
+                return BatchResult(item, result=result, attempts=attempt, seconds=time.perf_counter() - started)
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt > max_retries:
+                    return BatchResult(item, error=str(e), attempts=attempt, seconds=time.perf_counter() - started)
+                # The backoff is waited out in `limiter.wait`, outside the slot.
+                delay = retry_after(e) or backoff * 2 ** (attempt - 1) * (1 + random.random() / 2)
+                limiter.pause(delay)
+
+    tasks = [asyncio.create_task(run_one(item)) for item in items]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield await finished
+    finally:
+        for task in tasks:
+            task.cancel()
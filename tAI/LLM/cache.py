@@ -0,0 +1,141 @@
+"""
+This module implements the persistent response cache for generated commands.
+
+Entries live in a SQLite database in the user's cache directory and are keyed
+on a hash of (model id, prompt text, openrouter_all, normalized query). The
+cache is bounded by a maximum number of entries (least recently used entries
+are evicted first) and by a time to live.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+from contextlib import closing
+import time
+from typing import Optional
+
+from tAI.Utils.config_manager import config_manager
+from tAI.Utils.paths import cache_dir
+
+CACHE_FILE = "responses.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    prompt_hash TEXT NOT NULL,
+    command TEXT NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+CREATE INDEX IF NOT EXISTS responses_prompt_hash ON responses (prompt_hash);
+"""
+
+
+def normalize_query(query: str) -> str:
+    """Lowercases a query, collapses whitespace and drops trailing punctuation."""
+    return re.sub(r"\s+", " ", query).strip().lower().rstrip(" .?!")
+
+
+def prompt_hash(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode()).hexdigest()
+
+
+def cache_key(model: str, prompt: str, openrouter_all: bool, query: str) -> str:
+    payload = json.dumps([model, prompt_hash(prompt), openrouter_all, normalize_query(query)])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResponseCache:
+    """
+    A small LRU + TTL cache of generated commands backed by SQLite.
+
+    A new connection is opened (and closed) per operation so the cache can be used
+    from worker threads and from several tAI processes at once.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 1000, ttl_seconds: float = 7 * 24 * 3600):
+        self.path = path or os.path.join(cache_dir(), CACHE_FILE)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=5)
+        if not self._initialized:
+            try:
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.executescript(_SCHEMA)
+            except sqlite3.Error:
+                connection.close()
+                raise
+            self._initialized = True
+        return connection
+
+    def get(self, model: str, prompt: str, openrouter_all: bool, query: str) -> Optional[str]:
+        """Returns the cached command, or None on a miss or an expired entry."""
+        key = cache_key(model, prompt, openrouter_all, query)
+        now = time.time()
+        try:
+            with closing(self._connect()) as connection, connection:
+                row = connection.execute("SELECT command, created FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                command, created = row
+                if self.ttl_seconds and now - created > self.ttl_seconds:
+                    connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    return None
+                connection.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+        except sqlite3.Error:
+            # A broken or locked cache must never fail a request; treat it as a miss.
+            return None
+        return command
+
+    def put(self, model: str, prompt: str, openrouter_all: bool, query: str, command: str) -> None:
+        """Stores a command and evicts the least recently used entries above the size cap."""
+        key = cache_key(model, prompt, openrouter_all, query)
+        now = time.time()
+        try:
+            with closing(self._connect()) as connection, connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO responses (key, prompt_hash, command, created, last_used) VALUES (?, ?, ?, ?, ?)",
+                    (key, prompt_hash(prompt), command, now, now),
+                )
+                connection.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    "SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+        except sqlite3.Error:
+            pass
+
+    def invalidate_prompt(self, prompt: str) -> None:
+        """Drops every entry generated with the given system prompt."""
+        try:
+            with closing(self._connect()) as connection, connection:
+                connection.execute("DELETE FROM responses WHERE prompt_hash = ?", (prompt_hash(prompt),))
+        except sqlite3.Error:
+            # Saving a new prompt must not fail on the cache; its old entries just won't be hit.
+            pass
+
+    def clear(self) -> None:
+        try:
+            with closing(self._connect()) as connection, connection:
+                connection.execute("DELETE FROM responses")
+        except sqlite3.Error:
+            pass
+
+
+_cache: Optional[ResponseCache] = None
+
+
+def get_cache() -> ResponseCache:
+    """Returns the process-wide cache configured from config.json."""
+    global _cache
+    if _cache is None:
+        _cache = ResponseCache(
+            max_entries=config_manager.get_cache_max_entries(),
+            ttl_seconds=config_manager.get_cache_ttl_seconds(),
+        )
+    return _cache
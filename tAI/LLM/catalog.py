@@ -0,0 +1,172 @@
+"""
+This module holds the catalog of known models and what they can do.
+
+model_catalog.json is bundled with tAI and lists, per model id, its display
+name, provider, context window and output limit, price, whether it honours
+structured output and a rough typical latency. The file is versioned;
+`model_catalog.json` in the user's config directory can add or override
+entries in the same format. Models from config.json's `models` that the
+catalog doesn't know get an entry with just their name and provider, and their
+display names from config.json take precedence.
+
+Lookups by id and by display name are dictionary lookups, and nothing here
+imports an LLM backend, so `tai --models`, the TUI and the router can all use it.
+"""
+import json
+import os
+import threading
+from dataclasses import dataclass, fields
+from typing import Dict, List, Optional
+
+BUNDLED_CATALOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "model_catalog.json")
+USER_CATALOG = "model_catalog.json"
+# The catalog format this version of tAI reads. Files with another version are skipped.
+CATALOG_VERSION = 1
+
+
+@dataclass
+class ModelInfo:
+    """What the catalog knows about a model. Unknown values are None."""
+    id: str
+    name: str
+    provider: str
+    context_window: Optional[int] = None
+    max_output_tokens: Optional[int] = None
+    # USD per million tokens.
+    input_price: Optional[float] = None
+    output_price: Optional[float] = None
+    structured_output: Optional[bool] = None
+    # A rough prior in seconds, used until tAI has measured the model itself.
+    typical_latency_s: Optional[float] = None
+
+    @property
+    def free(self) -> bool:
+        return self.input_price == 0 and self.output_price == 0
+
+
+_FIELDS = {field.name for field in fields(ModelInfo)}
+
+
+def _provider(model_id: str) -> str:
+    return model_id.split("/", 1)[0]
+
+
+class ModelCatalog:
+    """The models tAI offers, indexed by id and by display name."""
+
+    def __init__(self, models: List[ModelInfo]):
+        self.models = models
+        self.by_id: Dict[str, ModelInfo] = {model.id: model for model in models}
+        self.by_name: Dict[str, ModelInfo] = {model.name: model for model in models}
+
+    @classmethod
+    def load(cls, paths: List[str], configured: Optional[Dict[str, str]] = None) -> "ModelCatalog":
+        """
+        Loads and merges catalog files and the configured models.
+
+        Args:
+            paths (list): Catalog files; entries of later files override earlier ones by id.
+            configured (dict): Display name -> model id from config.json. If given, only
+                these models are offered, in this order and under these names.
+        """
+        known: Dict[str, ModelInfo] = {}
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            with open(path) as f:
+                catalog = json.load(f)
+            if catalog.get("version") != CATALOG_VERSION:
+                continue
+            for entry in catalog.get("models", []):
+                info = ModelInfo(**{key: value for key, value in entry.items() if key in _FIELDS})
+                known[info.id] = info
+
+        if configured is None:
+            return cls(list(known.values()))
+
+        models = []
+        for name, model_id in configured.items():
+            info = known.get(model_id) or ModelInfo(id=model_id, name=name, provider=_provider(model_id))
+            info.name = name
+            models.append(info)
+        return cls(models)
+
+    def get(self, model_id: str) -> Optional[ModelInfo]:
+        return self.by_id.get(model_id)
+
+    def name_of(self, model_id: str) -> Optional[str]:
+        """Returns the display name of a model id, or None if it isn't offered."""
+        info = self.by_id.get(model_id)
+        return info.name if info is not None else None
+
+    def id_of(self, name: str) -> Optional[str]:
+        """Returns the model id behind a display name, or None."""
+        info = self.by_name.get(name)
+        return info.id if info is not None else None
+
+    def as_dict(self) -> Dict[str, str]:
+        """Returns display name -> model id, the shape of config.json's `models`."""
+        return {model.name: model.id for model in self.models}
+
+
+_catalog: Optional[ModelCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog() -> ModelCatalog:
+    """Returns the catalog of the models configured in config.json, built once per process."""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            from tAI.Utils.config_manager import config_manager
+            from tAI.Utils.paths import config_dir
+
+            _catalog = ModelCatalog.load(
+                [BUNDLED_CATALOG, os.path.join(config_dir(), USER_CATALOG)],
+                config_manager.get_models(),
+            )
+        return _catalog
+
+
+def _format_tokens(count: Optional[int]) -> str:
+    if count is None:
+        return "-"
+    if count >= 1_000_000:
+        return f"{count / 1_000_000:.0f}M"
+    return f"{count // 1000}k"
+
+
+def _format_price(info: ModelInfo) -> str:
+    if info.input_price is None or info.output_price is None:
+        return "-"
+    if info.free:
+        return "free"
+    return f"{info.input_price:g}/{info.output_price:g}"
+
+
+def print_models(catalog: ModelCatalog, p50: Optional[Dict[str, float]] = None) -> None:
+    """
+    Prints the offered models as a table for `tai --models`.
+
+    Args:
+        catalog (ModelCatalog): The models to list.
+        p50 (dict): Measured median latencies by model id; the catalog's typical latency
+            (marked with ~) is shown for models without measurements.
+    """
+    p50 = p50 or {}
+    header = ("Name", "Identifier", "Provider", "Context", "$/M in/out", "JSON", "Latency")
+    rows = []
+    for info in catalog.models:
+        if info.id in p50:
+            latency = f"{p50[info.id]:.1f}s"
+        elif info.typical_latency_s is not None:
+            latency = f"~{info.typical_latency_s:g}s"
+        else:
+            latency = "-"
+        structured = {True: "yes", False: "no", None: "?"}[info.structured_output]
+        rows.append((info.name, info.id, info.provider, _format_tokens(info.context_window), _format_price(info), structured, latency))
+
+    widths = [max(len(row[column]) for row in rows + [header]) for column in range(len(header))]
+    print("Available models:")
+    for row in [header] + rows:
+        print("  " + "  ".join(value.ljust(width) for value, width in zip(row, widths)).rstrip())
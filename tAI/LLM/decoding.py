@@ -0,0 +1,154 @@
+"""
+This module extracts the generated command from a model's reply.
+
+Models are asked for a `{"command": "..."}` object, but not every model honours
+structured output: some wrap the JSON in a markdown code fence, add prose
+around it, cut it off, or ignore the format and reply with the bare command
+(which is what the system prompt asks for). The decoder tries, in order:
+
+1. the whole reply as JSON (the fast path for models that follow the schema),
+2. the `command` string of a JSON object anywhere in the reply, fenced or not,
+   which also survives a missing closing brace,
+3. the body of a fenced code block,
+4. for a reply that reads like prose, the longest code span in it
+   ("The command is `du -sh *`."),
+5. the reply itself, as raw text, unless it reads like prose.
+
+Only the first counts as the model supporting structured output. An empty
+command, or prose without anything that looks like a command, is an error
+rather than something to paste or run.
+"""
+import json
+import re
+from dataclasses import dataclass
+
+# How a command was found, from the strictest to the most lenient.
+JSON = "json"
+EMBEDDED_JSON = "embedded_json"
+CODE_BLOCK = "code_block"
+CODE_SPAN = "code_span"
+TEXT = "text"
+
+_COMMAND_KEY = re.compile(r'"command"\s*:\s*"')
+_CODE_BLOCK = re.compile(r"```[\w+-]*[ \t]*\n?(.*?)(?:```|$)", re.DOTALL)
+_CODE_SPAN = re.compile(r"`([^`\n]+)`")
+# A sentence ending and the next one starting: "... the files. Then ..."
+_SENTENCE_BREAK = re.compile(r"[.!?:]\s+[A-Z][a-z]+\b")
+# First words of an explanation, which no command starts with.
+_PROSE_OPENERS = {
+    "the", "this", "that", "these", "here", "here's", "to", "you", "your", "i", "i'm",
+    "sure", "sure,", "certainly", "certainly,", "unfortunately", "sorry", "it", "it's", "we",
+    "use", "run", "try",
+}
+_QUOTED = re.compile(r"'[^']*'|\"(?:[^\"\\]|\\.)*\"")
+_SHELL_PROMPT = re.compile(r"^\$ ", re.MULTILINE)
+
+
+class DecodeError(Exception):
+    """Raised when a reply holds nothing that could be a command."""
+
+
+@dataclass
+class DecodedCommand:
+    command: str
+    method: str
+
+    @property
+    def structured(self) -> bool:
+        """Whether the reply was exactly the requested JSON object."""
+        return self.method == JSON
+
+
+def _embedded_command(text: str):
+    """Returns the `command` string of a JSON object in the text, even if the object is incomplete."""
+    match = _COMMAND_KEY.search(text)
+    if match is None:
+        return None
+    try:
+        # scanstring decodes one JSON string starting after its opening quote.
+        value, _ = json.decoder.scanstring(text, match.end())
+    except ValueError:
+        return None
+    return value
+
+
+def decode_command(content: str) -> DecodedCommand:
+    """
+    Extracts the command from a model's reply.
+
+    Args:
+        content (str): The message content of the reply.
+
+    Raises:
+        DecodeError: If the reply is empty, or a JSON object without a complete command.
+    """
+    decoded = _decode(content)
+    if not decoded.command.strip():
+        raise DecodeError("The model returned an empty command")
+    return decoded
+
+
+def _decode(content: str) -> DecodedCommand:
+    text = (content or "").strip()
+    if not text:
+        raise DecodeError("The model returned an empty response")
+
+    if text.startswith("{"):
+        try:
+            command = json.loads(text)["command"]
+            if isinstance(command, str):
+                return DecodedCommand(command, JSON)
+        except (ValueError, KeyError, TypeError):
+            pass
+
+    command = _embedded_command(text)
+    if command is not None:
+        return DecodedCommand(command, EMBEDDED_JSON)
+    if text.startswith("{"):
+        # JSON without a usable command (cut off mid-string, wrong key) must not be pasted as one.
+        raise DecodeError(f"No command in the model's response: {text[:200]}")
+
+    block = _CODE_BLOCK.search(text)
+    if block is not None and block.group(1).strip():
+        return DecodedCommand(_strip_prompt(block.group(1)), CODE_BLOCK)
+
+    if not looks_like_prose(text):
+        return DecodedCommand(_strip_prompt(text), TEXT)
+
+    # Only prose is searched for code spans: in a bare command, backticks are command substitution.
+    spans = _CODE_SPAN.findall(text)
+    if spans:
+        return DecodedCommand(_strip_prompt(max(spans, key=len)), CODE_SPAN)
+    raise DecodeError(f"The model replied with an explanation instead of a command: {text[:200]}")
+
+
+def looks_like_prose(text: str) -> bool:
+    """Checks whether a reply reads like sentences of English rather than a shell command."""
+    words = text.split()
+    if words[0].lower() in _PROSE_OPENERS:
+        return True
+    # Quoted arguments (commit messages, echo) may hold sentences of their own.
+    if _SENTENCE_BREAK.search(_QUOTED.sub("''", text)):
+        return True
+    # "List the files in the current directory." Commands start lowercase and rarely end in a period.
+    return text[0].isupper() and text.endswith(".") and len(words) > 3
+
+
+def _strip_prompt(command: str) -> str:
+    """Drops surrounding whitespace and copied shell prompts ("$ ls")."""
+    return _SHELL_PROMPT.sub("", command.strip()).strip()
+
+
+def rejects_structured_output(error: BaseException) -> bool:
+    """Checks whether a request failed because the model or provider doesn't accept `response_format`."""
+    while error is not None:
+        if type(error).__name__ == "UnsupportedParamsError":
+            return True
+        status = getattr(error, "status_code", None)
+        message = str(error).lower()
+        if status in (400, 404, 422) and any(
+            word in message for word in ("response_format", "json_schema", "json mode", "structured output")
+        ):
+            return True
+        error = error.__cause__
+    return False
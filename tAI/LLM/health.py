@@ -0,0 +1,291 @@
+"""
+This module keeps per-model request health across runs.
+
+Every request outcome (latency and whether it succeeded, was rate limited,
+timed out or failed otherwise) is stored in a SQLite database in the user's
+state directory. The router and race mode read rolling latency percentiles and
+error rates from it, and a circuit breaker skips a model for a cool-down period
+after several failures in a row.
+
+It also remembers which models honour structured output (`response_format`),
+so models that don't are asked without it.
+"""
+import os
+import sqlite3
+from contextlib import closing
+import statistics
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+from tAI.Utils import metrics
+
+HEALTH_FILE = "health.sqlite3"
+
+OK = "ok"
+ERROR = "error"
+RATE_LIMITED = "rate_limited"
+TIMEOUT = "timeout"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outcomes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    model TEXT NOT NULL,
+    ts REAL NOT NULL,
+    seconds REAL NOT NULL,
+    outcome TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS outcomes_model ON outcomes (model, id);
+CREATE TABLE IF NOT EXISTS breakers (
+    model TEXT PRIMARY KEY,
+    failures INTEGER NOT NULL,
+    open_until REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS capabilities (
+    model TEXT PRIMARY KEY,
+    structured_output INTEGER NOT NULL,
+    ts REAL NOT NULL
+);
+"""
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """Checks for an HTTP 429, whichever client library raised it, including errors it caused."""
+    while error is not None:
+        if getattr(error, "status_code", None) == 429:
+            return True
+        response = getattr(error, "response", None)
+        if getattr(response, "status_code", None) == 429:
+            return True
+        if type(error).__name__ == "RateLimitError":
+            return True
+        error = error.__cause__
+    return False
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Returns the server's Retry-After in seconds, if the error carries one."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+# Transport failures of the HTTP clients and SDKs, by class name so none of them has to be imported.
+_TRANSIENT_ERRORS = {
+    "ConnectError", "ReadError", "WriteError", "RemoteProtocolError", "NetworkError",
+    "APIConnectionError", "ServiceUnavailableError", "InternalServerError",
+}
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Checks whether another model could succeed where this request failed.
+
+    Timeouts, rate limits, 5xx responses, dropped connections and replies without
+    a usable command are; configuration and authentication errors (a missing key,
+    a 401) are not, because the next model would only hide them.
+    """
+    from tAI.LLM.decoding import DecodeError
+
+    if is_rate_limit_error(error) or classify(error) == TIMEOUT:
+        return True
+    while error is not None:
+        status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+        if isinstance(status, int) and status >= 500:
+            return True
+        if isinstance(error, (ConnectionError, DecodeError)) or type(error).__name__ in _TRANSIENT_ERRORS:
+            return True
+        error = error.__cause__
+    return False
+
+
+def classify(error: BaseException) -> str:
+    """Maps a failed request's exception to an outcome."""
+    if is_rate_limit_error(error):
+        return RATE_LIMITED
+    if isinstance(error, TimeoutError) or type(error).__name__ in ("Timeout", "APITimeoutError", "TimeoutException"):
+        return TIMEOUT
+    return ERROR
+
+
+@dataclass
+class ModelStats:
+    """Rolling statistics of one model over its most recent requests."""
+    model: str
+    count: int
+    p50: Optional[float]
+    p95: Optional[float]
+    error_rate: float
+    rate_limit_rate: float
+    open_until: float = 0.0
+
+    @property
+    def available(self) -> bool:
+        """False while the circuit breaker is open."""
+        return self.open_until <= time.time()
+
+
+class ModelHealth:
+    """
+    Request outcomes per model, backed by SQLite.
+
+    Like the response cache, a connection is opened per operation so the store
+    can be shared by worker threads, the daemon and several tAI processes.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        window: int = 100,
+        failure_threshold: int = 3,
+        cooldown_seconds: float = 120,
+    ):
+        if path is None:
+            from tAI.Utils.paths import state_dir
+
+            path = os.path.join(state_dir(), HEALTH_FILE)
+        self.path = path
+        self.window = window
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=5)
+        if not self._initialized:
+            try:
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.executescript(_SCHEMA)
+            except sqlite3.Error:
+                connection.close()
+                raise
+            self._initialized = True
+        return connection
+
+    def record(self, model: str, seconds: float, outcome: str = OK) -> None:
+        """
+        Stores one request outcome and updates the model's circuit breaker.
+
+        Args:
+            model (str): The model id that was called.
+            seconds (float): How long the request took.
+            outcome (str): OK, ERROR, RATE_LIMITED or TIMEOUT.
+        """
+        now = time.time()
+        try:
+            with closing(self._connect()) as connection, connection:
+                connection.execute(
+                    "INSERT INTO outcomes (model, ts, seconds, outcome) VALUES (?, ?, ?, ?)",
+                    (model, now, seconds, outcome),
+                )
+                connection.execute(
+                    "DELETE FROM outcomes WHERE model = ? AND id NOT IN ("
+                    "SELECT id FROM outcomes WHERE model = ? ORDER BY id DESC LIMIT ?)",
+                    (model, model, self.window),
+                )
+                if outcome == OK:
+                    connection.execute("DELETE FROM breakers WHERE model = ?", (model,))
+                    return
+                row = connection.execute("SELECT failures FROM breakers WHERE model = ?", (model,)).fetchone()
+                failures = (row[0] if row else 0) + 1
+                open_until = now + self.cooldown_seconds if failures >= self.failure_threshold else 0.0
+                connection.execute(
+                    "INSERT OR REPLACE INTO breakers (model, failures, open_until) VALUES (?, ?, ?)",
+                    (model, failures, open_until),
+                )
+        except sqlite3.Error:
+            # Health data is advisory; a locked or broken store must never fail a request.
+            pass
+
+    def stats(self, model: str) -> ModelStats:
+        """Returns the rolling statistics of a model (empty if it has no history)."""
+        try:
+            with closing(self._connect()) as connection, connection:
+                rows = connection.execute(
+                    "SELECT seconds, outcome FROM outcomes WHERE model = ? ORDER BY id DESC LIMIT ?",
+                    (model, self.window),
+                ).fetchall()
+                breaker = connection.execute("SELECT open_until FROM breakers WHERE model = ?", (model,)).fetchone()
+        except sqlite3.Error:
+            rows, breaker = [], None
+
+        latencies = sorted(seconds for seconds, outcome in rows if outcome == OK)
+        count = len(rows)
+        return ModelStats(
+            model=model,
+            count=count,
+            p50=statistics.median(latencies) if latencies else None,
+            p95=metrics.percentile(latencies, 95) if latencies else None,
+            error_rate=sum(outcome != OK for _, outcome in rows) / count if count else 0.0,
+            rate_limit_rate=sum(outcome == RATE_LIMITED for _, outcome in rows) / count if count else 0.0,
+            open_until=breaker[0] if breaker else 0.0,
+        )
+
+    def p50(self, model: str) -> Optional[float]:
+        """Returns the median latency of a model's successful requests, or None without history."""
+        return self.stats(model).p50
+
+    def structured_output(self, model: str) -> Optional[bool]:
+        """Returns whether a model honours `response_format`, or None if that isn't known yet."""
+        try:
+            with closing(self._connect()) as connection, connection:
+                row = connection.execute(
+                    "SELECT structured_output FROM capabilities WHERE model = ?", (model,)
+                ).fetchone()
+        except sqlite3.Error:
+            return None
+        return bool(row[0]) if row else None
+
+    def set_structured_output(self, model: str, supported: bool) -> None:
+        """Remembers whether a model honours `response_format`."""
+        try:
+            with closing(self._connect()) as connection, connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO capabilities (model, structured_output, ts) VALUES (?, ?, ?)",
+                    (model, int(supported), time.time()),
+                )
+        except sqlite3.Error:
+            pass
+
+    def models(self) -> List[str]:
+        """Returns every model with recorded outcomes."""
+        try:
+            with closing(self._connect()) as connection, connection:
+                return [row[0] for row in connection.execute("SELECT DISTINCT model FROM outcomes ORDER BY model")]
+        except sqlite3.Error:
+            return []
+
+
+def print_health(health: ModelHealth) -> None:
+    """Prints the rolling statistics of every model for `tai --stats`."""
+    rows = [health.stats(model) for model in health.models()]
+    if not rows:
+        return
+    width = max(len(row.model) for row in rows)
+    print("Model health (recent requests):")
+    print(f"  {'':{width}}  {'count':>6}  {'p50 s':>7}  {'p95 s':>7}  {'errors':>7}  {'429s':>7}  breaker")
+    for row in rows:
+        p50 = f"{row.p50:.2f}" if row.p50 is not None else "-"
+        p95 = f"{row.p95:.2f}" if row.p95 is not None else "-"
+        breaker = "open" if not row.available else "closed"
+        print(f"  {row.model:{width}}  {row.count:>6}  {p50:>7}  {p95:>7}  {row.error_rate:>7.0%}  {row.rate_limit_rate:>7.0%}  {breaker}")
+    print()
+
+
+_health: Optional[ModelHealth] = None
+
+
+def get_health() -> ModelHealth:
+    """Returns the process-wide health store configured from config.json."""
+    global _health
+    if _health is None:
+        from tAI.Utils.config_manager import config_manager
+
+        _health = ModelHealth(
+            failure_threshold=config_manager.get_router_failure_threshold(),
+            cooldown_seconds=config_manager.get_router_cooldown_seconds(),
+        )
+    return _health
@@ -0,0 +1,225 @@
+"""
+This module answers common requests offline, before any model is asked.
+
+A corpus of intent -> command templates is bundled in instant_answers.json and
+can be extended with the same format in `instant_answers.json` in the user's
+config directory (user entries win). Intents may contain typed slots such as
+`{size}` or `{port}`, which are filled from the query and substituted into the
+command.
+
+Queries are matched through an inverted index from stemmed words to intents and
+scored by word overlap (Jaccard) once slot values are taken out. A query with
+a content word that neither the intent nor one of its slots accounts for never
+matches, since the template would drop it. Only matches scoring at least
+`instant_min_confidence` are used, everything else falls through to the model.
+"""
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+from tAI.LLM.result import GenerationResult
+
+BUNDLED_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "instant_answers.json")
+USER_CORPUS = "instant_answers.json"
+# The pseudo model id reported for instant answers.
+INSTANT_MODEL_ID = "instant"
+
+# What a slot value may look like. Values are substituted into shell commands,
+# so none of these can contain quotes, spaces or a leading dash.
+SLOT_PATTERNS = {
+    "size": r"\d+\s*(?:[kmg]i?b?|bytes?)?",
+    "count": r"\d+",
+    "port": r"\d{1,5}",
+    "ext": r"\.?[a-z0-9+]+",
+    "word": r"[\w@][\w.@-]*",
+    "path": r"[\w./~][\w./~-]*",
+}
+
+STOPWORDS = {
+    "a", "an", "the", "all", "any", "please", "me", "my", "i", "in", "of", "for", "to", "on",
+    "is", "are", "this", "that", "here", "with", "and", "can", "you", "do", "how", "command",
+}
+
+_TOKEN = re.compile(r"[a-z0-9+]+")
+_SLOT = re.compile(r"\{(\w+)\}")
+
+
+def stem(word: str) -> str:
+    """Strips common English plural endings so "ports" matches "port"."""
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 4 and word.endswith("es") and word[-3] in "sxz":
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def content_words(text: str) -> List[str]:
+    """Returns the stemmed words of a text that carry meaning."""
+    return [stem(word) for word in _TOKEN.findall(text.lower()) if word not in STOPWORDS]
+
+
+def normalize_slot(kind: str, value: str, aliases: Dict[str, Dict[str, str]]) -> str:
+    """Brings a slot value into the form its command expects, e.g. "100 mb" -> "100M" for find."""
+    value = aliases.get(kind, {}).get(value.lower(), value)
+    if kind == "size":
+        number, unit = re.match(r"(\d+)\s*([a-z]*)", value.lower()).groups()
+        unit = {"k": "k", "m": "M", "g": "G", "b": "c"}.get(unit[:1], "M")
+        return number + unit
+    if kind == "ext":
+        return value.lower().lstrip(".")
+    return value
+
+
+@dataclass
+class Intent:
+    """One intent phrasing of a corpus entry, compiled for matching."""
+    entry: int
+    text: str
+    words: Set[str]
+    slots: List[str]
+    # Per slot, a regex that finds its value between its neighbouring literal words.
+    slot_finders: Dict[str, re.Pattern] = field(default_factory=dict)
+
+
+@dataclass
+class InstantMatch:
+    """A confident offline answer."""
+    command: str
+    confidence: float
+    intent: str
+
+
+def _compile_intent(entry: int, text: str) -> Intent:
+    slots = _SLOT.findall(text)
+    literal = _SLOT.sub(" ", text)
+    intent = Intent(entry=entry, text=text, words=set(content_words(literal)), slots=slots)
+    pieces = _SLOT.split(text)
+    # re.split with a group alternates literal text and slot names.
+    for position in range(1, len(pieces), 2):
+        name = pieces[position]
+        pattern = SLOT_PATTERNS.get(name, SLOT_PATTERNS["word"])
+        before = pieces[position - 1].split()
+        after = pieces[position + 1].split() if position + 1 < len(pieces) else []
+        finder = rf"\b{re.escape(before[-1])}\s+" if before else r"(?<![\w.])"
+        finder += rf"(?P<value>{pattern})"
+        finder += rf"\s+{re.escape(after[0])}\b" if after else r"(?![\w.])"
+        intent.slot_finders[name] = re.compile(finder, re.IGNORECASE)
+    return intent
+
+
+class InstantAnswers:
+    """The loaded corpus and its inverted index."""
+
+    def __init__(self, entries: List[dict], aliases: Optional[Dict[str, Dict[str, str]]] = None):
+        self.entries = entries
+        self.aliases = aliases or {}
+        self.intents: List[Intent] = []
+        self.index: Dict[str, List[int]] = {}
+        for entry_id, entry in enumerate(entries):
+            for text in entry["intents"]:
+                intent_id = len(self.intents)
+                intent = _compile_intent(entry_id, text.lower())
+                self.intents.append(intent)
+                for word in intent.words:
+                    self.index.setdefault(word, []).append(intent_id)
+
+    @classmethod
+    def load(cls, paths: List[str]) -> "InstantAnswers":
+        """Loads and merges corpus files; entries and aliases of later files take precedence."""
+        entries: List[dict] = []
+        aliases: Dict[str, Dict[str, str]] = {}
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            with open(path) as f:
+                corpus = json.load(f)
+            entries = corpus.get("entries", []) + entries
+            for kind, mapping in corpus.get("slot_aliases", {}).items():
+                aliases.setdefault(kind, {}).update(mapping)
+        return cls(entries, aliases)
+
+    def _fill(self, intent: Intent, query: str) -> Optional[Tuple[Dict[str, str], Set[str]]]:
+        """Finds every slot of an intent in the query, keeping its case. Returns the values and the words they used."""
+        values: Dict[str, str] = {}
+        used: Set[str] = set()
+        for name in intent.slots:
+            found = intent.slot_finders[name].search(query)
+            if found is None:
+                return None
+            raw = found.group("value")
+            values[name] = normalize_slot(name, raw, self.aliases)
+            used.update(content_words(raw))
+        return values, used
+
+    def match(self, query: str, min_confidence: float = 0.8) -> Optional[InstantMatch]:
+        """
+        Returns the best confident answer for a query, or None.
+
+        Args:
+            query (str): The user's request.
+            min_confidence (float): The minimum word-overlap score, between 0 and 1.
+        """
+        query = re.sub(r"\s+", " ", query).strip().rstrip(" .?!")
+        words = set(content_words(query))
+        candidates = sorted({intent_id for word in words for intent_id in self.index.get(word, ())})
+
+        best: Optional[Tuple[Tuple[float, int], Intent, Dict[str, str]]] = None
+        for intent_id in candidates:
+            intent = self.intents[intent_id]
+            filled = self._fill(intent, query)
+            if filled is None:
+                continue
+            values, used = filled
+            remaining = words - (used - intent.words)
+            if remaining - intent.words:
+                # A word the intent has no place for ("... in /tmp", "... on the server")
+                # narrows or changes the request, and the template would silently drop it.
+                continue
+            union = remaining | intent.words
+            score = len(remaining & intent.words) / len(union) if union else 0.0
+            # Ties go to the more specific phrasing.
+            rank = (score, len(intent.words) + len(intent.slots))
+            if best is None or rank > best[0]:
+                best = (rank, intent, values)
+
+        if best is None or best[0][0] < min_confidence:
+            return None
+        (score, _), intent, values = best
+        entry = self.entries[intent.entry]
+        slots = dict(entry.get("defaults", {}), **values)
+        try:
+            command = _SLOT.sub(lambda slot: slots[slot.group(1)], entry["command"])
+        except KeyError:
+            # The command needs a slot this phrasing doesn't provide.
+            return None
+        return InstantMatch(command=command, confidence=score, intent=intent.text)
+
+
+_engine: Optional[InstantAnswers] = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> InstantAnswers:
+    """Returns the corpus loaded from the bundled and the user's files, built once per process."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            from tAI.Utils.paths import config_dir
+
+            _engine = InstantAnswers.load([BUNDLED_CORPUS, os.path.join(config_dir(), USER_CORPUS)])
+        return _engine
+
+
+def instant_result(query: str) -> Optional[GenerationResult]:
+    """Answers a query from the corpus if the match is confident enough, otherwise returns None."""
+    from tAI.Utils.config_manager import config_manager
+
+    found = get_engine().match(query, config_manager.get_instant_min_confidence())
+    if found is None:
+        return None
+    return GenerationResult(command=found.command, model=INSTANT_MODEL_ID, source="instant")
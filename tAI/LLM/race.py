@@ -0,0 +1,152 @@
+"""
+This module races one query across several models and keeps the first valid answer.
+
+Requests can be hedged: instead of firing every model at once, the next model is
+only started when the previous ones haven't answered within a delay, by default
+the observed median latency of the model that was started first. Latencies come
+from the persisted health store, so they carry over between runs.
+"""
+import asyncio
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Awaitable, Callable, Dict, List, Tuple, Union
+
+from tAI.LLM.health import OK, classify, get_health
+
+# The pseudo model id that selects race mode in MODEL_DICT / config.json.
+RACE_MODEL_ID = "race"
+
+
+def order_by_latency(models: List[str]) -> List[str]:
+    """Sorts models by observed median latency; models without samples keep their order at the end."""
+    p50 = {model: get_health().p50(model) for model in models}
+    known = [m for m in models if p50[m] is not None]
+    unknown = [m for m in models if p50[m] is None]
+    return sorted(known, key=p50.get) + unknown
+
+
+def _hedge_timeout(hedge_delay: Union[None, float, str], last_model: str) -> float:
+    """Returns how long to wait for an answer before starting the next model."""
+    if hedge_delay is None:
+        return 0
+    if hedge_delay == "p50":
+        # Without samples there's nothing to hedge on, so start the next model right away.
+        return get_health().p50(last_model) or 0
+    return float(hedge_delay)
+
+
+def race(
+    models: List[str],
+    complete: Callable[[str], str],
+    hedge_delay: Union[None, float, str] = None,
+) -> Tuple[str, str]:
+    """
+    Sends the same request to several models and returns the first valid answer.
+
+    Args:
+        models (list): Model ids to race, at least one.
+        complete (callable): Generates a command for one model id. It must raise if
+            the response doesn't parse into the command schema.
+        hedge_delay: None to start every model at once, a number of seconds to wait
+            before starting each next model, or "p50" to wait for the observed median
+            latency of the model started last.
+
+    Returns:
+        The winning model id and its command.
+
+    Raises:
+        Exception: If every model failed.
+    """
+    if not models:
+        raise Exception("No race_models configured")
+    pending_models = order_by_latency(models)
+    executor = ThreadPoolExecutor(max_workers=len(pending_models), thread_name_prefix="tai-race")
+    running: Dict[Future, Tuple[str, float]] = {}
+    errors = []
+
+    def start_next() -> str:
+        model = pending_models.pop(0)
+        running[executor.submit(complete, model)] = (model, time.monotonic())
+        return model
+
+    try:
+        last_model = start_next()
+        while running:
+            timeout = _hedge_timeout(hedge_delay, last_model) if pending_models else None
+            if timeout == 0:
+                last_model = start_next()
+                continue
+            done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                # Nobody answered within the hedge delay: start the next model too.
+                last_model = start_next()
+                continue
+            for future in done:
+                model, started = running.pop(future)
+                try:
+                    command = future.result()
+                except Exception as e:
+                    get_health().record(model, time.monotonic() - started, classify(e))
+                    errors.append(f"{model}: {e}")
+                    continue
+                get_health().record(model, time.monotonic() - started, OK)
+                return model, command
+            if not running and pending_models:
+                # Everything in flight failed; don't wait out the hedge delay.
+                last_model = start_next()
+    finally:
+        # The losers can't be interrupted mid-request, but their results are dropped.
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    raise Exception("All raced models failed: " + "; ".join(errors))
+
+
+async def arace(
+    models: List[str],
+    complete: Callable[[str], Awaitable[str]],
+    hedge_delay: Union[None, float, str] = None,
+) -> Tuple[str, str]:
+    """
+    Async variant of `race`. The losing requests are cancelled, which aborts
+    their HTTP requests. The health store is read and written in a thread, off
+    the event loop.
+    """
+    if not models:
+        raise Exception("No race_models configured")
+    pending_models = await asyncio.to_thread(order_by_latency, models)
+    running: Dict[asyncio.Task, Tuple[str, float]] = {}
+    errors = []
+
+    def start_next() -> str:
+        model = pending_models.pop(0)
+        running[asyncio.create_task(complete(model))] = (model, time.monotonic())
+        return model
+
+    try:
+        last_model = start_next()
+        while running:
+            timeout = await asyncio.to_thread(_hedge_timeout, hedge_delay, last_model) if pending_models else None
+            if timeout == 0:
+                last_model = start_next()
+                continue
+            done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                last_model = start_next()
+                continue
+            for task in done:
+                model, started = running.pop(task)
+                try:
+                    command = task.result()
+                except Exception as e:
+                    await asyncio.to_thread(get_health().record, model, time.monotonic() - started, classify(e))
+                    errors.append(f"{model}: {e}")
+                    continue
+                await asyncio.to_thread(get_health().record, model, time.monotonic() - started, OK)
+                return model, command
+            if not running and pending_models:
+                last_model = start_next()
+    finally:
+        for task in running:
+            task.cancel()
+
+    raise Exception("All raced models failed: " + "; ".join(errors))
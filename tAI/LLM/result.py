@@ -0,0 +1,22 @@
+"""
+This module defines the result type shared by every generation path.
+
+It is kept free of heavy imports so the daemon client and the TUI can use it
+without importing the LLM backend.
+"""
+from dataclasses import dataclass
+
+
+@dataclass
+class GenerationResult:
+    """A generated command and where it came from."""
+    command: str
+    model: str
+    # "network" for a fresh provider response, "cache" for a response cache hit,
+    # "instant" for an offline answer from the instant-answer corpus, "history" for
+    # a command reused from the request history.
+    source: str = "network"
+
+    @property
+    def cached(self) -> bool:
+        return self.source == "cache"
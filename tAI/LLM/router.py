@@ -0,0 +1,156 @@
+"""
+This module decides which model answers a request and falls back when it fails.
+
+The "auto" model picks the fastest healthy model out of `auto_models`, ranked by
+the latency percentiles and error rates in the persisted health store. Any other
+model is tried first and followed by the `fallback_models` chain. Either way a
+failing request (timeout, 429, 5xx, dropped connection) moves on to the next
+model, and models whose circuit breaker is open are skipped until their
+cool-down has passed. Configuration and authentication errors are raised
+straight away: they aren't the model's fault and another model would hide them.
+"""
+import asyncio
+import time
+from typing import Awaitable, Callable, List, Tuple, TypeVar
+
+from tAI.LLM.catalog import get_catalog
+from tAI.LLM.health import OK, ModelHealth, ModelStats, classify, get_health, is_retryable
+
+# The pseudo model id that selects automatic routing in MODEL_DICT / config.json.
+AUTO_MODEL_ID = "auto"
+
+T = TypeVar("T")
+
+
+class RoutingError(Exception):
+    """Raised when every model in the chain failed; the last failure is its cause."""
+
+
+def _typical_latency(model: str) -> float:
+    """The catalog's typical latency of a model; unknown models sort last."""
+    info = get_catalog().get(model)
+    if info is None or info.typical_latency_s is None:
+        return float("inf")
+    return info.typical_latency_s
+
+
+def _score(stats: ModelStats) -> float:
+    """Expected seconds to a successful answer: the median latency inflated by the error rate."""
+    return stats.p50 / max(0.05, 1 - stats.error_rate)
+
+
+class Router:
+    """Orders candidate models and runs a request along them."""
+
+    def __init__(self, health: ModelHealth, auto_models: List[str], fallback_models: List[str]):
+        self.health = health
+        self.auto_models = auto_models
+        self.fallback_models = fallback_models
+
+    def chain(self, model: str) -> List[str]:
+        """
+        Returns the models to try for a request, in order.
+
+        For "auto", healthy models with history come first, fastest first, then
+        models without history (so they get measured) by their typical latency in
+        the catalog, then models whose breaker is open. For any other model the
+        selected one leads, followed by the fallbacks. Open breakers move to the
+        end, so a chain is never empty.
+        """
+        if model == AUTO_MODEL_ID:
+            candidates = list(dict.fromkeys(self.auto_models))
+            if not candidates:
+                raise Exception("No auto_models configured")
+            stats = {candidate: self.health.stats(candidate) for candidate in candidates}
+            measured = sorted(
+                (c for c in candidates if stats[c].available and stats[c].p50 is not None),
+                key=lambda c: _score(stats[c]),
+            )
+            # Without measurements, the catalog's typical latency is the best guess.
+            unmeasured = sorted(
+                (c for c in candidates if stats[c].available and stats[c].p50 is None),
+                key=_typical_latency,
+            )
+            tripped = [c for c in candidates if not stats[c].available]
+            return measured + unmeasured + tripped
+
+        candidates = list(dict.fromkeys([model] + self.fallback_models))
+        available = [c for c in candidates if self.health.stats(c).available]
+        return available + [c for c in candidates if c not in available]
+
+    def _failed(self, errors: List[Tuple[str, Exception]]) -> Exception:
+        if len(errors) == 1:
+            return errors[0][1]
+        error = RoutingError("All models failed: " + "; ".join(f"{model}: {e}" for model, e in errors))
+        error.__cause__ = errors[-1][1]
+        return error
+
+    def candidates(self, model: str, fallback: bool = True) -> List[str]:
+        """The chain, or without fallback only the model itself ("auto": the best one right now)."""
+        if fallback:
+            return self.chain(model)
+        return self.chain(model)[:1] if model == AUTO_MODEL_ID else [model]
+
+    def run(self, model: str, attempt: Callable[[str], T], fallback: bool = True) -> Tuple[str, T]:
+        """
+        Runs `attempt` with each model of the chain until one succeeds.
+
+        Args:
+            model (str): The requested model id, or "auto".
+            attempt (callable): Makes the request with one model.
+            fallback (bool): Whether to move on to the fallback models. Callers with
+                their own retry policy (batch mode) turn it off.
+
+        Returns:
+            The model that answered and the attempt's result.
+
+        Raises:
+            Exception: A failure that isn't worth retrying elsewhere, as soon as it happens;
+                the only failure if the chain had one model; otherwise a RoutingError.
+        """
+        errors: List[Tuple[str, Exception]] = []
+        for candidate in self.candidates(model, fallback):
+            started = time.monotonic()
+            try:
+                result = attempt(candidate)
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                self.health.record(candidate, time.monotonic() - started, classify(e))
+                errors.append((candidate, e))
+                continue
+            self.health.record(candidate, time.monotonic() - started, OK)
+            return candidate, result
+        raise self._failed(errors)
+
+    async def arun(self, model: str, attempt: Callable[[str], Awaitable[T]], fallback: bool = True) -> Tuple[str, T]:
+        """
+        Async variant of `run`. Cancellation is not recorded as a failure.
+
+        The health store is read and written in a thread, off the event loop.
+        """
+        errors: List[Tuple[str, Exception]] = []
+        for candidate in await asyncio.to_thread(self.candidates, model, fallback):
+            started = time.monotonic()
+            try:
+                result = await attempt(candidate)
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                await asyncio.to_thread(self.health.record, candidate, time.monotonic() - started, classify(e))
+                errors.append((candidate, e))
+                continue
+            await asyncio.to_thread(self.health.record, candidate, time.monotonic() - started, OK)
+            return candidate, result
+        raise self._failed(errors)
+
+
+def get_router() -> Router:
+    """Returns a router over the shared health store, with the model lists currently in config.json."""
+    from tAI.Utils.config_manager import config_manager
+
+    return Router(
+        get_health(),
+        auto_models=config_manager.get_auto_models(),
+        fallback_models=config_manager.get_fallback_models(),
+    )
@@ -0,0 +1,110 @@
+"""
+This module parses a streamed `{"command": "..."}` payload incrementally.
+
+The parser is fed raw text chunks as they arrive and exposes the part of the
+command string decoded so far, so the UI can render it token by token and the
+caller can stop reading the stream as soon as the closing quote arrives.
+Malformed escape sequences are kept as literal text rather than failing the
+stream, like the final decoder tolerates malformed replies.
+"""
+import json
+import re
+
+from tAI.LLM.decoding import JSON, DecodedCommand, decode_command
+
+_COMMAND_KEY = re.compile(r'"command"\s*:\s*"')
+
+
+class CommandStreamParser:
+    """Incrementally decodes the `command` string of a JSON object."""
+
+    def __init__(self):
+        self.buffer = ""
+        self.value = ""
+        self.complete = False
+        self._pos = None  # Index in `buffer` of the next undecoded character of the value.
+
+    def feed(self, chunk: str) -> str:
+        """
+        Adds a chunk of streamed text.
+
+        Args:
+            chunk (str): The next piece of the model's output.
+
+        Returns:
+            The command decoded so far.
+        """
+        if self.complete or not chunk:
+            return self.value
+        self.buffer += chunk
+
+        if self._pos is None:
+            match = _COMMAND_KEY.search(self.buffer)
+            if match is None:
+                return self.value
+            self._pos = match.end()
+
+        decoded = []
+        pos = self._pos
+        buffer = self.buffer
+        while pos < len(buffer):
+            char = buffer[pos]
+            if char == '"':
+                self.complete = True
+                pos += 1
+                break
+            if char != "\\":
+                decoded.append(char)
+                pos += 1
+                continue
+            escape = self._escape_length(buffer, pos)
+            if escape is None:
+                # The escape sequence is split across chunks; wait for the rest.
+                break
+            sequence = buffer[pos:pos + escape]
+            try:
+                decoded.append(json.loads(f'"{sequence}"'))
+            except ValueError:
+                decoded.append(sequence)
+            pos += escape
+
+        self._pos = pos
+        self.value += "".join(decoded)
+        return self.value
+
+    @staticmethod
+    def _escape_length(buffer: str, pos: int):
+        """Returns the length of the escape sequence at `pos`, or None if it is incomplete."""
+        if pos + 1 >= len(buffer):
+            return None
+        if buffer[pos + 1] != "u":
+            return 2
+        if pos + 6 > len(buffer):
+            return None
+        try:
+            code = int(buffer[pos + 2:pos + 6], 16)
+        except ValueError:
+            # Not four hex digits: only the backslash and "u" are the (malformed) escape.
+            return 2
+        if 0xD800 <= code <= 0xDBFF:
+            # A high surrogate is only decodable together with the low surrogate after it.
+            if pos + 12 > len(buffer):
+                return None
+            if buffer[pos + 6:pos + 8] == "\\u":
+                return 12
+        return 6
+
+    def result(self) -> DecodedCommand:
+        """
+        Returns the final command once the stream has ended.
+
+        Falls back to decoding the whole buffer, for providers that only send the
+        payload in one piece at the end of the stream and for replies that aren't
+        the requested JSON.
+
+        Raises:
+            DecodeError: If the reply holds no command.
+        """
+        if self.complete and self.value.strip() and self.buffer.lstrip().startswith("{"):
+            return DecodedCommand(self.value, JSON)
+        return decode_command(self.buffer)
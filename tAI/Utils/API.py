@@ -1,53 +1,129 @@
+"""
+This module resolves the API key to use for a model.
+
+Providers are described in the `PROVIDERS` table, keyed by the model id prefix
+(`gemini/...`, `openai/...`). `local/...` models run on a self-hosted
+OpenAI-compatible server and only use a key if one is configured.
+
+Keys are read from the bundled .env file, decrypted once and cached in memory.
+The cache is dropped when .env or secret.key changes on disk, so a key saved
+from the settings screen or with `tai --openai KEY` takes effect on the next
+request without a restart.
+"""
 import os
-from dotenv import load_dotenv
-from tAI.Utils.security import decrypt_data
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from dotenv import dotenv_values
+
+from tAI.Utils import metrics, security
 
 APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DOTENV_PATH = os.path.join(APP_ROOT, ".env")
-load_dotenv(dotenv_path=DOTENV_PATH, override=True)
+
+
+@dataclass(frozen=True)
+class ProviderSpec:
+    """How to find the API key of one provider."""
+    # The name used by the CLI flags and the settings screen (e.g. "google").
+    name: str
+    # The .env variable holding the encrypted key.
+    env_var: str
+    # An alternative variable used unless "openrouter for all" is enabled (the bundled free key).
+    free_env_var: Optional[str] = None
+    # Whether requests fail without a key. Local servers usually don't check one.
+    key_required: bool = True
+
+    def key_variable(self, openrouter_all: bool) -> str:
+        if self.free_env_var and not openrouter_all:
+            return self.free_env_var
+        return self.env_var
+
+
+PROVIDERS: Dict[str, ProviderSpec] = {
+    "gemini": ProviderSpec(name="google", env_var="GEMINI_API_KEY"),
+    "openai": ProviderSpec(name="openai", env_var="OPENAI_API_KEY"),
+    "anthropic": ProviderSpec(name="anthropic", env_var="ANTHROPIC_API_KEY"),
+    "openrouter": ProviderSpec(name="openrouter", env_var="OPENROUTER_API_KEY", free_env_var="OPENROUTER_FREE_API_KEY"),
+    "local": ProviderSpec(name="local", env_var="LOCAL_API_KEY", key_required=False),
+}
+
+LOCAL_PROVIDER = "local"
+# Sent to keyless local servers, because the OpenAI client refuses an empty key.
+NO_KEY = "no-key"
+
+
+def provider_for(model: str) -> ProviderSpec:
+    """Returns the provider entry for a model id."""
+    spec = PROVIDERS.get(model.split('/')[0])
+    if spec is None:
+        raise Exception("Invalid provider")
+    return spec
+
+
+def is_local_model(model: str) -> bool:
+    """Checks whether a model id belongs to the self-hosted OpenAI-compatible provider."""
+    return model.split('/')[0] == LOCAL_PROVIDER
+
+
+class CredentialStore:
+    """Decrypted API keys cached per process and invalidated when .env or secret.key change."""
+
+    def __init__(self, dotenv_path: str = DOTENV_PATH, key_path: str = security.KEY_PATH):
+        self.dotenv_path = dotenv_path
+        self.key_path = key_path
+        self._lock = threading.Lock()
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._values: Dict[str, Optional[str]] = {}
+        self._decrypted: Dict[str, str] = {}
+
+    @staticmethod
+    def _mtime(path: str) -> int:
+        try:
+            return os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    def _refresh(self) -> None:
+        stamp = (self._mtime(self.dotenv_path), self._mtime(self.key_path))
+        if stamp == self._stamp:
+            return
+        if self._stamp is not None and stamp[1] != self._stamp[1]:
+            security.reload_key()
+        self._values = dotenv_values(self.dotenv_path) if os.path.exists(self.dotenv_path) else {}
+        self._decrypted = {}
+        self._stamp = stamp
+
+    def get(self, variable: str) -> Optional[str]:
+        """Returns the decrypted value of a variable, or None if it isn't set."""
+        with self._lock:
+            self._refresh()
+            if variable not in self._decrypted:
+                encrypted = self._values.get(variable) or os.getenv(variable)
+                if not encrypted:
+                    return None
+                with metrics.span("key_decrypt"):
+                    self._decrypted[variable] = security.decrypt_data(encrypted)
+            return self._decrypted[variable]
+
+
+credential_store = CredentialStore()
+
 
 def get_api_key(model:str, openrouter_all: bool) -> str:
+    """
+    Returns the decrypted API key for a model.
 
-        provider = model.split('/')[0]
-
-        if provider == "gemini":
-            api_key = os.getenv("GEMINI_API_KEY")
-            if api_key:
-                return decrypt_data(api_key)
-            else:
-                raise Exception("GEMINI_API_KEY is not set")
-        
-        elif provider == "openai":
-            api_key = os.getenv("OPENAI_API_KEY")
-            if api_key:
-                return decrypt_data(api_key)
-            else:
-                raise Exception("OPENAI_API_KEY is not set")
-        
-        elif provider == "anthropic":
-            api_key = os.getenv("ANTHROPIC_API_KEY")
-            if api_key:
-                return decrypt_data(api_key)
-            else:
-                raise Exception("ANTHROPIC_API_KEY is not set")
-            
-        elif provider == "openrouter":
-            if not openrouter_all:
-                api_key = os.getenv("OPENROUTER_FREE_API_KEY")
-                print(api_key)
-                print(decrypt_data(api_key))
-                
-                if api_key:
-                    
-                    return decrypt_data(api_key)
-                else:
-                    raise Exception(f"OPENROUTER_FREE_API_KEY {api_key} is not found and {decrypt_data(api_key)}")
-            else:
-                api_key = os.getenv("OPENROUTER_API_KEY")
-                if api_key:
-                    return decrypt_data(api_key)
-                else:
-                    raise Exception("OPENROUTER_API_KEY is not set")
-            
-        else:
-            raise Exception("Invalid provider")
\ No newline at end of file
+    Args:
+        model (str): The model id, e.g. "gemini/gemini-2.0-flash".
+        openrouter_all (bool): Whether OpenRouter models use the paid key instead of the free one.
+    """
+    spec = provider_for(model)
+    variable = spec.key_variable(openrouter_all)
+    api_key = credential_store.get(variable)
+    if not api_key:
+        if not spec.key_required:
+            return NO_KEY
+        raise Exception(f"{variable} is not set")
+    return api_key
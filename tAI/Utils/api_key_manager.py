@@ -1,8 +1,10 @@
 """
 This module handles updating API keys in the .env file.
 """
-from dotenv import set_key
 import os
+import re
+from tAI.Utils.API import PROVIDERS
+from tAI.Utils.atomic_file import atomic_write, file_lock
 from tAI.Utils.security import encrypt_data
 
 # Determine the absolute path to the .env file based on the script's location.
@@ -10,6 +12,33 @@ from tAI.Utils.security import encrypt_data
 APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DOTENV_PATH = os.path.join(APP_ROOT, ".env")
 
+def set_env_value(path: str, variable_name: str, value: str) -> None:
+    """
+    Sets one variable in a .env file with an atomic, locked rewrite.
+
+    Other lines are kept as they are. The variable is appended if it isn't in
+    the file yet.
+
+    Args:
+        path (str): The .env file.
+        variable_name (str): The variable to set.
+        value (str): Its new value.
+    """
+    pattern = re.compile(rf"^\s*(export\s+)?{re.escape(variable_name)}\s*=")
+    new_line = f"{variable_name}='{value}'\n"
+    with file_lock(path):
+        with open(path, "r") as f:
+            lines = f.readlines()
+        for i, line in enumerate(lines):
+            if pattern.match(line):
+                lines[i] = new_line
+                break
+        else:
+            if lines and not lines[-1].endswith("\n"):
+                lines[-1] += "\n"
+            lines.append(new_line)
+        atomic_write(path, "".join(lines))
+
 def update_api_key(provider: str, api_key: str) -> None:
     """
     Updates the API key for a given provider in the bundled .env file.
@@ -18,12 +47,7 @@ def update_api_key(provider: str, api_key: str) -> None:
         provider (str): The name of the provider (e.g., 'google', 'openai').
         api_key (str): The API key to set.
     """
-    key_mapping = {
-        "google": "GEMINI_API_KEY",
-        "openai": "OPENAI_API_KEY",
-        "anthropic": "ANTHROPIC_API_KEY",
-        "openrouter": "OPENROUTER_API_KEY",
-    }
+    key_mapping = {spec.name: spec.env_var for spec in PROVIDERS.values()}
     
     variable_name = key_mapping.get(provider)
     if variable_name:
@@ -31,9 +55,9 @@ def update_api_key(provider: str, api_key: str) -> None:
         # Check if the .env file exists before trying to write to it.
         # The build script ensures it's created.
         if os.path.exists(DOTENV_PATH):
-            set_key(DOTENV_PATH, variable_name, encrypted_key)
+            set_env_value(DOTENV_PATH, variable_name, encrypted_key)
             print(f"✅ Successfully updated {provider.capitalize()} API key.")
         else:
             print(f"❌ Error: .env file not found at {DOTENV_PATH}. Please reinstall the package.")
     else:
-        print(f"❌ Invalid provider specified: {provider}") 
\ No newline at end of file
+        print(f"❌ Invalid provider specified: {provider}") 
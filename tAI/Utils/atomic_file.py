@@ -0,0 +1,42 @@
+"""
+This module provides crash- and concurrency-safe file writes.
+
+Files are written to a temporary file in the same directory and moved into
+place with os.replace, so readers only ever see the old or the new content,
+never a truncated file. Writers from several tAI processes are serialized
+with a lock file next to the target.
+"""
+import os
+import tempfile
+
+
+def file_lock(path: str, timeout: float = 10):
+    """Returns the inter-process lock (a filelock.FileLock) guarding writes to `path`."""
+    # filelock pulls in asyncio; importing it here keeps it off read-only CLI paths.
+    from filelock import FileLock
+
+    return FileLock(path + ".lock", timeout=timeout)
+
+
+def atomic_write(path: str, data: str) -> None:
+    """
+    Replaces the contents of `path` with `data` in one atomic step.
+
+    Args:
+        path (str): The file to write.
+        data (str): The new contents.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            os.chmod(temp_path, os.stat(path).st_mode & 0o777)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
@@ -3,22 +3,46 @@ This module handles reading and writing configuration from config.json.
 """
 import json
 import os
-from typing import Dict, Any
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Optional, Union
+
+from tAI.Utils import metrics
+from tAI.Utils.atomic_file import atomic_write, file_lock
 
 class ConfigManager:
     """
     This class handles reading and writing configuration from config.json.
-    It loads the configuration once and provides methods to access and modify it.
+    It loads the configuration once, reloads it when another process changed the
+    file, and provides methods to access and modify it.
+
+    Changes are written atomically under a lock file. Several changes can be
+    batched into a single write with `transaction()`.
     """
     def __init__(self, config_file: str = "config.json"):
         APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         self.config_file = os.path.join(APP_ROOT, config_file)
-        self.config = self._load_config()
+        self._lock = threading.RLock()
+        self._transaction_depth = 0
+        self._mtime_ns: Optional[int] = None
+        self._config = self._load_config()
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        """The current configuration, reloaded if config.json changed on disk."""
+        if self._transaction_depth == 0:
+            try:
+                if os.stat(self.config_file).st_mtime_ns != self._mtime_ns:
+                    self._config = self._load_config()
+            except FileNotFoundError:
+                pass
+        return self._config
 
     def _load_config(self) -> Dict[str, Any]:
         """Loads the configuration from the JSON file."""
         if os.path.exists(self.config_file):
-            with open(self.config_file, "r") as f:
+            with metrics.span("config_load"), open(self.config_file, "r") as f:
+                self._mtime_ns = os.fstat(f.fileno()).st_mtime_ns
                 try:
                     return json.load(f)
                 except json.JSONDecodeError as e:
@@ -27,8 +51,53 @@ class ConfigManager:
 
     def _save_config(self):
         """Saves the current configuration to the JSON file."""
-        with open(self.config_file, "w") as f:
-            json.dump(self.config, f, indent=2)
+        atomic_write(self.config_file, json.dumps(self._config, indent=2))
+        self._mtime_ns = os.stat(self.config_file).st_mtime_ns
+
+    @contextmanager
+    def transaction(self) -> Iterator[Dict[str, Any]]:
+        """
+        Batches configuration changes into one atomic write.
+
+        The file is locked and re-read first so changes made by other tAI processes
+        in the meantime are kept. Setters called inside the block don't write on
+        their own; everything is written once when the outermost block exits.
+
+        Example:
+            with config_manager.transaction():
+                config_manager.set_set_full_screen(True)
+                config_manager.set_set_openrouter_for_all(False)
+        """
+        with self._lock:
+            if self._transaction_depth > 0:
+                self._transaction_depth += 1
+                try:
+                    yield self._config
+                finally:
+                    self._transaction_depth -= 1
+                return
+
+            with file_lock(self.config_file):
+                self._config = self._load_config()
+                self._transaction_depth = 1
+                try:
+                    yield self._config
+                    self._save_config()
+                except BaseException:
+                    # Drop the half-applied changes; the file on disk is untouched.
+                    self._config = self._load_config()
+                    raise
+                finally:
+                    self._transaction_depth = 0
+
+    def update(self, **changes: Any) -> None:
+        """Sets several configuration keys with a single write."""
+        with self.transaction() as config:
+            config.update(changes)
+
+    def _set(self, key: str, value: Any) -> None:
+        with self.transaction() as config:
+            config[key] = value
 
     def get_default_model(self) -> str:
         """Gets the default model from the configuration."""
@@ -36,8 +105,7 @@ class ConfigManager:
 
     def set_default_model(self, model_id: str):
         """Sets the default model in the configuration."""
-        self.config["default_model"] = model_id
-        self._save_config()
+        self._set("default_model", model_id)
 
     def get_models(self) -> Dict[str, str]:
         """Gets the available models from the configuration."""
@@ -49,8 +117,11 @@ class ConfigManager:
 
     def set_prompt(self, prompt: str):
         """Sets the prompt in the configuration."""
-        self.config["prompt"] = prompt
-        self._save_config()
+        self._set("prompt", prompt)
+
+    def get_prompt_token_budget(self) -> int:
+        """Gets the prompt size (in estimated tokens) above which the settings screen warns."""
+        return self.config.get("prompt_token_budget", 1000)
 
     def get_set_full_screen(self) -> bool:
         """Gets the full screen setting from the configuration."""
@@ -58,8 +129,7 @@ class ConfigManager:
 
     def set_set_full_screen(self, full_screen: bool):
         """Sets the full screen setting in the configuration."""
-        self.config["set_full_screen"] = full_screen
-        self._save_config()
+        self._set("set_full_screen", full_screen)
 
     def get_set_openrouter_for_all(self) -> bool:
         """Gets the openrouter for all setting from the configuration."""
@@ -67,7 +137,122 @@ class ConfigManager:
 
     def set_set_openrouter_for_all(self, openrouter_for_all: bool):
         """Sets the openrouter for all setting in the configuration."""
-        self.config["set_openrouter_for_all"] = openrouter_for_all
-        self._save_config()
+        self._set("set_openrouter_for_all", openrouter_for_all)
+
+    def get_set_stream_response(self) -> bool:
+        """Gets the stream response setting from the configuration."""
+        return self.config.get("set_stream_response", True)
+
+    def set_set_stream_response(self, stream_response: bool):
+        """Sets the stream response setting in the configuration."""
+        self._set("set_stream_response", stream_response)
+
+    def get_set_speculative(self) -> bool:
+        """Gets the speculative pre-generation setting from the configuration."""
+        return self.config.get("set_speculative", False)
+
+    def set_set_speculative(self, speculative: bool):
+        """Sets the speculative pre-generation setting in the configuration."""
+        self._set("set_speculative", speculative)
+
+    def get_set_instant_answers(self) -> bool:
+        """Gets whether common requests are answered offline from the instant-answer corpus."""
+        return self.config.get("set_instant_answers", True)
+
+    def set_set_instant_answers(self, instant_answers: bool):
+        """Sets whether common requests are answered offline from the instant-answer corpus."""
+        self._set("set_instant_answers", instant_answers)
+
+    def get_instant_min_confidence(self) -> float:
+        """Gets the minimum match score (0-1) for an instant answer to be used."""
+        return self.config.get("instant_min_confidence", 0.8)
+
+    def get_speculative_debounce_ms(self) -> int:
+        """Gets how long typing must pause before a speculative generation starts."""
+        return self.config.get("speculative_debounce_ms", 600)
+
+    def get_speculative_min_interval(self) -> float:
+        """Gets the minimum number of seconds between two speculative generations."""
+        return self.config.get("speculative_min_interval", 2.0)
+
+    def get_speculative_max_per_session(self) -> int:
+        """Gets the maximum number of speculative generations per popup session."""
+        return self.config.get("speculative_max_per_session", 10)
+
+    def get_race_models(self) -> List[str]:
+        """Gets the model ids raced against each other in race mode."""
+        return self.config.get("race_models", [])
+
+    def get_race_hedge_delay(self) -> Union[None, float, str]:
+        """Gets the hedge delay for race mode: null, a number of seconds, or "p50"."""
+        return self.config.get("race_hedge_delay", "p50")
+
+    def get_auto_models(self) -> List[str]:
+        """Gets the models the "auto" model may choose from."""
+        return self.config.get("auto_models", [])
+
+    def get_fallback_models(self) -> List[str]:
+        """Gets the models tried in order when the selected model fails."""
+        return self.config.get("fallback_models", [])
+
+    def get_router_timeout(self) -> float:
+        """Gets how many seconds a request may take before the next model is tried."""
+        return self.config.get("router_timeout", 30)
+
+    def get_router_failure_threshold(self) -> int:
+        """Gets how many failures in a row make the router skip a model."""
+        return self.config.get("router_failure_threshold", 3)
+
+    def get_router_cooldown_seconds(self) -> float:
+        """Gets how long the router skips a model after repeated failures."""
+        return self.config.get("router_cooldown_seconds", 120)
+
+    def get_paste_backend(self) -> str:
+        """Gets the preferred terminal injection backend ("auto" picks the best available one)."""
+        return self.config.get("paste_backend", "auto")
+
+    def get_execute_timeout(self) -> float:
+        """Gets the execute mode timeout in seconds (0 means no timeout)."""
+        return self.config.get("execute_timeout", 30)
+
+    def get_execute_max_lines(self) -> int:
+        """Gets how many lines of command output execute mode keeps on screen."""
+        return self.config.get("execute_max_lines", 1000)
+
+    def get_cache_max_entries(self) -> int:
+        """Gets the maximum number of cached responses from the configuration."""
+        return self.config.get("cache_max_entries", 1000)
+
+    def get_cache_ttl_seconds(self) -> int:
+        """Gets how long a cached response stays valid, in seconds, from the configuration."""
+        return self.config.get("cache_ttl_seconds", 7 * 24 * 3600)
+
+    def get_history_max_entries(self) -> int:
+        """Gets how many distinct requests the history keeps (0 turns the history off)."""
+        return self.config.get("history_max_entries", 10000)
+
+    def get_local_base_url(self) -> str:
+        """Gets the base URL of the self-hosted OpenAI-compatible server used by `local/...` models."""
+        return self.config.get("local_base_url", "http://localhost:11434/v1")
+
+    def get_llm_backend(self) -> str:
+        """Gets the library requests are sent with: "http" (built in) or "litellm" (optional extra)."""
+        return self.config.get("llm_backend", "http")
+
+    def get_batch_concurrency(self) -> int:
+        """Gets how many requests `tai --batch` keeps in flight at once."""
+        return self.config.get("batch_concurrency", 8)
+
+    def get_batch_rate_limits(self) -> Dict[str, float]:
+        """Gets the per-provider request limits (requests per minute) for `tai --batch`."""
+        return self.config.get("batch_rate_limits", {"openrouter": 20})
+
+    def get_batch_max_retries(self) -> int:
+        """Gets how often `tai --batch` retries a rate-limited request."""
+        return self.config.get("batch_max_retries", 3)
+
+    def get_metrics_enabled(self) -> bool:
+        """Gets whether phase timings are written to the local metrics log."""
+        return self.config.get("metrics_enabled", True)
 
 config_manager = ConfigManager() 
\ No newline at end of file
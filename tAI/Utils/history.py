@@ -0,0 +1,201 @@
+"""
+This module keeps the history of requests made in the TUI.
+
+Every request that produced a command which was pasted or executed is stored in
+a SQLite database in the user's state directory, one row per distinct request:
+the query as typed, the model, the command, when it was last used and how. The
+normalized query is the primary key, so prefix lookups for recall and
+as-you-type suggestions are index range scans and stay fast with tens of
+thousands of entries. Above `history_max_entries` the least recently used
+requests are evicted first.
+"""
+import hashlib
+import os
+import re
+import sqlite3
+from contextlib import closing
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+HISTORY_FILE = "history.sqlite3"
+
+PASTED = "pasted"
+EXECUTED = "executed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    query_key TEXT PRIMARY KEY,
+    query TEXT NOT NULL,
+    model TEXT NOT NULL,
+    prompt_hash TEXT NOT NULL,
+    command TEXT NOT NULL,
+    action TEXT NOT NULL,
+    ts REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS history_ts ON history (ts);
+"""
+
+# Sorts after every character, so [prefix, prefix + _MAX_CHAR) is the range of keys starting with prefix.
+_MAX_CHAR = "\U0010ffff"
+# How many of the most recent requests a prefix search looks at before sorting every match.
+_RECENT_SCAN = 1000
+
+
+def query_key(query: str) -> str:
+    """The history key of a query: lowercased, whitespace collapsed, trailing punctuation dropped."""
+    return re.sub(r"\s+", " ", query).strip().lower().rstrip(" .?!")
+
+
+def prefix_key(text: str) -> str:
+    """Like `query_key`, but keeps trailing spaces so "ls " doesn't match "lsof"."""
+    return re.sub(r"\s+", " ", text).lstrip().lower()
+
+
+def prompt_hash(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode()).hexdigest()
+
+
+@dataclass
+class HistoryEntry:
+    """One remembered request."""
+    query: str
+    model: str
+    command: str
+    action: str
+    ts: float
+
+
+class QueryHistory:
+    """
+    The request history, backed by SQLite.
+
+    Like the response cache, a connection is opened and closed per operation,
+    and the database is only created when it is first used.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 10000):
+        if path is None:
+            from tAI.Utils.paths import state_dir
+
+            path = os.path.join(state_dir(), HISTORY_FILE)
+        self.path = path
+        self.max_entries = max_entries
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=1)
+        if not self._initialized:
+            try:
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.executescript(_SCHEMA)
+            except sqlite3.Error:
+                connection.close()
+                raise
+            self._initialized = True
+        return connection
+
+    def add(self, query: str, model: str, prompt: str, command: str, action: str = PASTED) -> None:
+        """
+        Remembers a request and evicts the least recently used ones above the size cap.
+
+        Args:
+            query (str): The request as the user typed it.
+            model (str): The model id the request was made with.
+            prompt (str): The system prompt the command was generated with.
+            command (str): The command that was used.
+            action (str): PASTED or EXECUTED.
+        """
+        key = query_key(query)
+        if not key or self.max_entries <= 0:
+            return
+        try:
+            with closing(self._connect()) as connection, connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO history (query_key, query, model, prompt_hash, command, action, ts) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, query.strip(), model, prompt_hash(prompt), command, action, time.time()),
+                )
+                connection.execute(
+                    "DELETE FROM history WHERE query_key IN ("
+                    "SELECT query_key FROM history ORDER BY ts DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+        except sqlite3.Error:
+            # History is a convenience; a locked or broken store must never fail a request.
+            pass
+
+    def search(self, prefix: str, limit: int = 50) -> List[HistoryEntry]:
+        """
+        Returns the requests starting with a prefix, most recently used first.
+
+        Args:
+            prefix (str): The text typed so far; an empty prefix matches every request.
+            limit (int): The maximum number of entries to return.
+        """
+        key = prefix_key(prefix)
+        bounds = (key, key + _MAX_CHAR)
+        try:
+            with closing(self._connect()) as connection, connection:
+                # A short prefix matches thousands of requests, but usually some recent
+                # ones too, so walk back from the newest first. Only if that comes up
+                # short are all matches sorted, and then there are few of them.
+                rows = connection.execute(
+                    "SELECT query, model, command, action, ts FROM ("
+                    "SELECT * FROM history ORDER BY ts DESC LIMIT ?) "
+                    "WHERE query_key >= ? AND query_key < ? LIMIT ?",
+                    (_RECENT_SCAN, *bounds, limit),
+                ).fetchall()
+                if len(rows) < limit:
+                    rows = connection.execute(
+                        "SELECT query, model, command, action, ts FROM history "
+                        "WHERE query_key >= ? AND query_key < ? ORDER BY ts DESC LIMIT ?",
+                        (*bounds, limit),
+                    ).fetchall()
+        except sqlite3.Error:
+            return []
+        return [HistoryEntry(*row) for row in rows]
+
+    def suggest(self, prefix: str) -> Optional[str]:
+        """Returns the most recently used request that completes the prefix, or None."""
+        if not prefix.strip():
+            return None
+        entries = self.search(prefix, limit=1)
+        # The input shows the suggestion past what was typed, so it must start with exactly that.
+        if entries and entries[0].query.lower().startswith(prefix.lower()):
+            return entries[0].query
+        return None
+
+    def lookup(self, query: str, model: str, prompt: str) -> Optional[str]:
+        """
+        Returns the stored command for a request if it is still valid, otherwise None.
+
+        A command is still valid if it was generated for the same request by the
+        same model with the same system prompt.
+        """
+        try:
+            with closing(self._connect()) as connection, connection:
+                row = connection.execute(
+                    "SELECT command FROM history WHERE query_key = ? AND model = ? AND prompt_hash = ?",
+                    (query_key(query), model, prompt_hash(prompt)),
+                ).fetchone()
+        except sqlite3.Error:
+            return None
+        return row[0] if row else None
+
+    def clear(self) -> None:
+        with closing(self._connect()) as connection, connection:
+            connection.execute("DELETE FROM history")
+
+
+_history: Optional[QueryHistory] = None
+
+
+def get_history() -> QueryHistory:
+    """Returns the process-wide history configured from config.json."""
+    global _history
+    if _history is None:
+        from tAI.Utils.config_manager import config_manager
+
+        _history = QueryHistory(max_entries=config_manager.get_history_max_entries())
+    return _history
@@ -0,0 +1,162 @@
+"""
+This module records per-phase timings of tAI runs.
+
+Code wraps the phases it wants measured in `span("phase", model=...)`. Spans
+are buffered in memory and appended to a rotating JSONL file in the user's
+state directory by `flush()`, which the entry points call once per run (or per
+request in the daemon). `tai --stats` summarizes the file with `summarize()`.
+"""
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+METRICS_FILE = "metrics.jsonl"
+MAX_BYTES = 1024 * 1024
+BACKUP_COUNT = 3
+
+_lock = threading.Lock()
+_spans: List[Dict[str, Any]] = []
+_run_id = os.urandom(6).hex()
+
+
+def record(phase: str, seconds: float, **tags: Any) -> None:
+    """
+    Records one measured phase.
+
+    Args:
+        phase (str): The phase name, e.g. "network_total".
+        seconds (float): How long it took.
+        **tags: Extra fields to store with it, e.g. model="openai/gpt-4o".
+    """
+    entry = {"ts": round(time.time(), 3), "run": _run_id, "phase": phase, "ms": round(seconds * 1000, 3)}
+    entry.update({key: value for key, value in tags.items() if value is not None})
+    with _lock:
+        _spans.append(entry)
+
+
+@contextmanager
+def span(phase: str, **tags: Any) -> Iterator[None]:
+    """Measures the wrapped block as `phase`, whether or not it raises."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(phase, time.perf_counter() - started, **tags)
+
+
+def metrics_path() -> str:
+    from tAI.Utils.paths import state_dir
+
+    return os.path.join(state_dir(), METRICS_FILE)
+
+
+def _rotate(path: str) -> None:
+    for index in range(BACKUP_COUNT - 1, 0, -1):
+        source = f"{path}.{index}"
+        if os.path.exists(source):
+            os.replace(source, f"{path}.{index + 1}")
+    os.replace(path, f"{path}.1")
+
+
+def flush() -> None:
+    """Appends the buffered spans to the metrics log, rotating it when it grows too large."""
+    global _run_id
+    from tAI.Utils.config_manager import config_manager
+
+    with _lock:
+        spans = list(_spans)
+        _spans.clear()
+        _run_id = os.urandom(6).hex()
+    if not spans or not config_manager.get_metrics_enabled():
+        return
+
+    try:
+        path = metrics_path()
+        if os.path.exists(path) and os.path.getsize(path) > MAX_BYTES:
+            from tAI.Utils.atomic_file import file_lock
+
+            with file_lock(path):
+                if os.path.exists(path) and os.path.getsize(path) > MAX_BYTES:
+                    _rotate(path)
+        with open(path, "a") as f:
+            f.write("".join(json.dumps(entry) + "\n" for entry in spans))
+    except OSError:
+        # Metrics are best effort and must never break a run.
+        pass
+
+
+def load(path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Reads every recorded span, oldest log file first. Lines without a phase and a duration are skipped."""
+    path = path or metrics_path()
+    files = [f"{path}.{index}" for index in range(BACKUP_COUNT, 0, -1)] + [path]
+    entries = []
+    for file in files:
+        if not os.path.exists(file):
+            continue
+        with open(file) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if isinstance(entry, dict) and "phase" in entry and isinstance(entry.get("ms"), (int, float)):
+                    entries.append(entry)
+    return entries
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(entries: List[Dict[str, Any]]) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """
+    Groups spans by phase and by (phase, model) and computes p50/p95/p99 in ms.
+
+    Returns:
+        {"phases": {phase: stats}, "models": {"phase @ model": stats}}
+    """
+    by_phase: Dict[str, List[float]] = {}
+    by_model: Dict[str, List[float]] = {}
+    for entry in entries:
+        by_phase.setdefault(entry["phase"], []).append(entry["ms"])
+        if entry.get("model"):
+            by_model.setdefault(f"{entry['phase']} @ {entry['model']}", []).append(entry["ms"])
+
+    def stats(values: List[float]) -> Dict[str, float]:
+        return {
+            "count": len(values),
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "p99": percentile(values, 99),
+        }
+
+    return {
+        "phases": {name: stats(values) for name, values in sorted(by_phase.items())},
+        "models": {name: stats(values) for name, values in sorted(by_model.items())},
+    }
+
+
+def print_stats() -> None:
+    """Prints the p50/p95/p99 table for `tai --stats`."""
+    entries = load()
+    if not entries:
+        print(f"No timings recorded yet ({metrics_path()}).")
+        return
+    summary = summarize(entries)
+    for title, rows in (("Per phase", summary["phases"]), ("Per phase and model", summary["models"])):
+        if not rows:
+            continue
+        width = max(len(name) for name in rows)
+        print(f"{title}:")
+        print(f"  {'':{width}}  {'count':>6}  {'p50 ms':>10}  {'p95 ms':>10}  {'p99 ms':>10}")
+        for name, row in rows.items():
+            print(f"  {name:{width}}  {row['count']:>6}  {row['p50']:>10.1f}  {row['p95']:>10.1f}  {row['p99']:>10.1f}")
+        print()
+    print(f"Recorded in {metrics_path()}")
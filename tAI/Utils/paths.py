@@ -0,0 +1,43 @@
+"""
+This module resolves the per-user directories tAI keeps runtime files in.
+"""
+import os
+from platformdirs import user_cache_dir, user_config_dir, user_runtime_dir, user_state_dir
+
+APP_NAME = "tAI"
+
+
+def runtime_dir(create: bool = True) -> str:
+    """
+    Returns the per-user runtime directory (sockets, pid files).
+
+    Args:
+        create (bool): Whether to create it if needed. Clients that only look for
+            a socket pass False, since the directory may not be creatable (no
+            XDG_RUNTIME_DIR or /run/user/$UID under su, cron or in containers).
+    """
+    path = user_runtime_dir(APP_NAME)
+    if create:
+        os.makedirs(path, mode=0o700, exist_ok=True)
+    return path
+
+
+def cache_dir() -> str:
+    """Returns the per-user cache directory, creating it if needed."""
+    path = user_cache_dir(APP_NAME)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def state_dir() -> str:
+    """Returns the per-user state directory (logs, statistics), creating it if needed."""
+    path = user_state_dir(APP_NAME)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def config_dir() -> str:
+    """Returns the per-user configuration directory (user additions to bundled data), creating it if needed."""
+    path = user_config_dir(APP_NAME)
+    os.makedirs(path, exist_ok=True)
+    return path
@@ -21,6 +21,12 @@ def load_key():
 _key = load_key()
 _fernet = Fernet(_key)
 
+def reload_key():
+    """Reloads the encryption key, e.g. after secret.key was replaced."""
+    global _key, _fernet
+    _key = load_key()
+    _fernet = Fernet(_key)
+
 def encrypt_data(data: str) -> str:
     """Encrypts a string."""
     if not data:
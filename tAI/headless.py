@@ -0,0 +1,233 @@
+"""
+This module implements the non-interactive `tai -q "query"` and `tai --batch` modes.
+
+They resolve the model and prompt from the configuration like the TUI does, ask
+the daemon first and fall back to generating in-process, and print to stdout.
+Textual is never imported, so they start in a fraction of the TUI's time and are
+usable from scripts, editor integrations and shell keybindings.
+"""
+import asyncio
+import json
+import sys
+import time
+from typing import TYPE_CHECKING, Iterable, List, Optional
+
+from tAI.Daemon import client as daemon_client
+from tAI.LLM.catalog import get_catalog
+from tAI.LLM.result import GenerationResult
+from tAI.Utils import metrics
+from tAI.Utils.config_manager import config_manager
+
+if TYPE_CHECKING:
+    from tAI.LLM.batch import BatchItem
+
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_USAGE = 2
+EXIT_INTERRUPTED = 130
+
+
+def generate(model: str, query: str, use_cache: bool = True) -> GenerationResult:
+    """
+    Generates a command through the daemon if one is running, in-process otherwise.
+
+    Args:
+        model (str): The model identifier.
+        query (str): What the command should do.
+        use_cache (bool): Whether the response cache may answer.
+
+    Raises:
+        Exception: If generation failed.
+    """
+    if config_manager.get_set_instant_answers():
+        from tAI.LLM.instant import instant_result
+
+        result = instant_result(query)
+        if result is not None:
+            return result
+    prompt = config_manager.get_prompt()
+    openrouter_all = config_manager.get_set_openrouter_for_all()
+    result = daemon_client.generate(model, query, prompt, openrouter_all, use_cache)
+    if result is None:
+        from tAI.LLM.LLM_Integration import llm
+
+        result = llm(prompt=prompt, openrouter_all=openrouter_all, use_cache=use_cache).generate(model, query)
+    return result
+
+
+def run_query(query: str, model: Optional[str] = None, as_json: bool = False, use_cache: bool = True) -> int:
+    """
+    Generates one command and prints it to stdout.
+
+    Args:
+        query (str): What the command should do, or "-" to read it from stdin.
+        model (Optional[str]): The model identifier. Defaults to the configured default model.
+        as_json (bool): Print a JSON object with the command, model, source and timing instead.
+        use_cache (bool): Whether the response cache may answer.
+
+    Returns:
+        The process exit code.
+    """
+    if query == "-":
+        query = sys.stdin.read()
+    query = query.strip()
+    if not query:
+        print("❌ Error: The query is empty.", file=sys.stderr)
+        return EXIT_USAGE
+
+    model = model or config_manager.get_default_model()
+    if model not in get_catalog().by_id:
+        print(f"❌ Error: Model '{model}' not found.", file=sys.stderr)
+        print("Please use the --models flag to see the list of available models.", file=sys.stderr)
+        return EXIT_USAGE
+
+    started = time.perf_counter()
+    try:
+        result = generate(model, query, use_cache)
+    except KeyboardInterrupt:
+        return EXIT_INTERRUPTED
+    except Exception as e:
+        if as_json:
+            print(json.dumps({"error": str(e), "model": model}))
+        else:
+            print(f"❌ Error: {e}", file=sys.stderr)
+        return EXIT_ERROR
+    finally:
+        metrics.record("headless", time.perf_counter() - started, model=model)
+        metrics.flush()
+
+    if as_json:
+        print(json.dumps({
+            "command": result.command,
+            "model": result.model,
+            "source": result.source,
+            "seconds": round(time.perf_counter() - started, 3),
+        }))
+    else:
+        print(result.command)
+    return EXIT_OK
+
+
+def read_batch(lines: Iterable[str], default_model: str) -> List["BatchItem"]:
+    """
+    Parses batch input: one query per line, or JSONL objects with a "query" and an optional "model".
+
+    Blank lines are skipped but still count towards the indexes, so an index is
+    always the input's line number minus one.
+
+    Raises:
+        ValueError: If a JSON line is malformed or has no query.
+    """
+    from tAI.LLM.batch import BatchItem
+
+    items = []
+    for index, line in enumerate(lines):
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("{"):
+            try:
+                entry = json.loads(line)
+                query = entry["query"]
+            except (json.JSONDecodeError, KeyError, TypeError) as e:
+                raise ValueError(f"line {index + 1}: expected a JSON object with a \"query\" ({e})")
+            items.append(BatchItem(index=index, query=query, model=entry.get("model") or default_model))
+        else:
+            items.append(BatchItem(index=index, query=line, model=default_model))
+    return items
+
+
+def run_batch(source: str, model: Optional[str] = None, use_cache: bool = True) -> int:
+    """
+    Generates commands for every query in a file (or stdin) and prints JSONL results in completion order.
+
+    Args:
+        source (str): Path of the input file, or "-" for stdin.
+        model (Optional[str]): Model identifier for lines that don't name one. Defaults to the default model.
+        use_cache (bool): Whether the response cache may answer.
+
+    Returns:
+        The process exit code: 0 if every query succeeded, 1 if any failed.
+    """
+    default_model = model or config_manager.get_default_model()
+    try:
+        if source == "-":
+            items = read_batch(sys.stdin, default_model)
+        else:
+            with open(source) as f:
+                items = read_batch(f, default_model)
+    except (OSError, ValueError) as e:
+        print(f"❌ Error: {e}", file=sys.stderr)
+        return EXIT_USAGE
+
+    catalog = get_catalog()
+    unknown = sorted({item.model for item in items if item.model not in catalog.by_id})
+    if unknown:
+        print(f"❌ Error: Model '{unknown[0]}' not found.", file=sys.stderr)
+        print("Please use the --models flag to see the list of available models.", file=sys.stderr)
+        return EXIT_USAGE
+
+    try:
+        failed = asyncio.run(_run_batch(items, use_cache))
+    except KeyboardInterrupt:
+        return EXIT_INTERRUPTED
+    finally:
+        metrics.flush()
+    return EXIT_ERROR if failed else EXIT_OK
+
+
+async def _run_batch(items: List["BatchItem"], use_cache: bool) -> int:
+    """Runs the batch, printing each result as it completes. Returns the number of failures."""
+    from tAI.LLM.batch import run_batch as generate_batch
+
+    prompt = config_manager.get_prompt()
+    openrouter_all = config_manager.get_set_openrouter_for_all()
+    use_daemon = daemon_client.is_running()
+    use_instant = config_manager.get_set_instant_answers()
+    generator = None
+
+    def answer_offline(query: str) -> Optional[GenerationResult]:
+        from tAI.LLM.instant import instant_result
+
+        return instant_result(query)
+
+    def resolve(model: str) -> str:
+        from tAI.LLM.router import AUTO_MODEL_ID, get_router
+
+        return get_router().candidates(model, fallback=False)[0] if model == AUTO_MODEL_ID else model
+
+    async def generate_one(model: str, query: str) -> GenerationResult:
+        # Batch retries rate limits itself, per provider, so the router must not reroute them.
+        nonlocal generator, use_daemon
+        if use_daemon:
+            result = await daemon_client.agenerate(model, query, prompt, openrouter_all, use_cache, fallback=False)
+            if result is not None:
+                return result
+            use_daemon = False
+        if generator is None:
+            from tAI.LLM.LLM_Integration import llm
+
+            generator = llm(prompt=prompt, openrouter_all=openrouter_all, use_cache=use_cache)
+        return await generator.agenerate(model, query, fallback=False)
+
+    failed = 0
+    async for outcome in generate_batch(
+        items,
+        generate_one,
+        openrouter_all=openrouter_all,
+        concurrency=config_manager.get_batch_concurrency(),
+        rate_limits=config_manager.get_batch_rate_limits(),
+        max_retries=config_manager.get_batch_max_retries(),
+        answer_offline=answer_offline if use_instant else None,
+        resolve=resolve,
+    ):
+        line = {"index": outcome.item.index, "query": outcome.item.query}
+        if outcome.error is not None:
+            failed += 1
+            line.update({"model": outcome.item.model, "error": outcome.error})
+        else:
+            line.update({"command": outcome.result.command, "model": outcome.result.model, "source": outcome.result.source})
+        line.update({"attempts": outcome.attempts, "seconds": round(outcome.seconds, 3)})
+        metrics.record("batch_item", outcome.seconds, model=outcome.item.model)
+        print(json.dumps(line), flush=True)
+    return failed
@@ -1,9 +1,20 @@
+import time
+
+_started = time.perf_counter()
+
 import argparse
-from tAI.App.app import TAI
-from tAI.KeyAutomation import Automate
-from tAI.Utils.api_key_manager import update_api_key
+import os
+import sys
+from typing import Optional
+from tAI.Utils import metrics
 from tAI.Utils.config_manager import config_manager
 
+metrics.record("startup_imports", time.perf_counter() - _started)
+
+# Heavy subsystems (Textual, the LLM backend, pynput, cryptography) are imported inside
+# the code paths that need them, so flag-only invocations like `tai --models`
+# return without paying their import cost.
+
 def tAI():
     parser = argparse.ArgumentParser(description="🤖 AI Command Helper", formatter_class=argparse.RawTextHelpFormatter)
     parser.add_argument("--google", type=str, help="Set the Google Gemini API key")
@@ -13,18 +24,60 @@ def tAI():
     parser.add_argument("--default-model", type=str, help="Set the default model for the application")
     parser.add_argument("--models", action="store_true", help="List all available models")
     parser.add_argument("--fullscreen", type=str.lower, choices=['true', 'false'], help="Set the fullscreen mode (true or false)")
+    parser.add_argument("--daemon", action="store_true", help="Start a background daemon that keeps the LLM client warm")
+    parser.add_argument("--stop-daemon", action="store_true", help="Stop the background daemon")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the response cache for this run")
+    parser.add_argument("--stats", action="store_true", help="Show p50/p95/p99 timings per phase and model")
+    parser.add_argument("-q", "--query", type=str, help="Print a command for QUERY to stdout without opening the TUI (- reads stdin)")
+    parser.add_argument("--batch", type=str, metavar="FILE", help="Generate commands for every query in FILE (one per line or JSONL, - reads stdin) and print JSONL results")
+    parser.add_argument("--model", type=str, help="Model identifier to use with --query or --batch instead of the default model")
+    parser.add_argument("--json", action="store_true", help="With --query, print JSON with the command, model and timing")
+    parser.add_argument("--shell-init", type=str, choices=["bash", "zsh", "fish"], help="Print a Ctrl+X Ctrl+T widget for your shell that puts the command straight into the prompt")
+    parser.add_argument("--output-fd", type=int, metavar="FD", help="Write the chosen command to file descriptor FD instead of pasting it (used by --shell-init)")
     args = parser.parse_args()
 
-    models = config_manager.get_models()
+    if args.daemon:
+        from tAI.Daemon.server import start_daemon
+        start_daemon()
+        return
+
+    if args.stop_daemon:
+        from tAI.Daemon.server import stop_daemon
+        stop_daemon()
+        return
+
+    if args.stats:
+        from tAI.LLM.health import get_health, print_health
+        print_health(get_health())
+        metrics.print_stats()
+        return
+
+    if args.shell_init:
+        from tAI.shell_init import shell_init
+        print(shell_init(args.shell_init), end="")
+        return
+
+    if args.query is not None:
+        from tAI.headless import run_query
+        sys.exit(run_query(args.query, model=args.model, as_json=args.json, use_cache=not args.no_cache))
+
+    if args.batch is not None:
+        from tAI.headless import run_batch
+        sys.exit(run_batch(args.batch, model=args.model, use_cache=not args.no_cache))
+
+    from tAI.LLM.catalog import get_catalog
+    catalog = get_catalog()
 
     if args.models:
-        print("Available models:")
-        for name, identifier in models.items():
-            print(f"- {name}: {identifier}")
+        from tAI.LLM.catalog import print_models
+        from tAI.LLM.health import get_health
+        health = get_health()
+        latencies = {model: health.p50(model) for model in health.models()}
+        print_models(catalog, {model: p50 for model, p50 in latencies.items() if p50 is not None})
         return
 
     if args.default_model:
-        if args.default_model in models.values():
+        if args.default_model in catalog.by_id:
             config_manager.set_default_model(args.default_model)
             print(f"✅ Default model set to: {args.default_model}")
         else:
@@ -45,22 +98,46 @@ def tAI():
         "openrouter": args.openrouter,
     }
 
-    updated = False
-    for provider, key in api_keys_to_update.items():
-        if key:
-            update_api_key(provider, key)
-            updated = True
+    if any(api_keys_to_update.values()):
+        from tAI.Utils.api_key_manager import update_api_key
 
-    if updated:
+        for provider, key in api_keys_to_update.items():
+            if key:
+                update_api_key(provider, key)
         return
 
-    automate = Automate()
+    if args.output_fd is not None:
+        try:
+            os.fstat(args.output_fd)
+        except OSError:
+            print(f"❌ Error: File descriptor {args.output_fd} is not open", file=sys.stderr)
+            sys.exit(2)
+
+    run_tui(catalog.as_dict(), use_cache=not args.no_cache, output_fd=args.output_fd)
+
+
+def run_tui(models: dict, use_cache: bool = True, output_fd: Optional[int] = None) -> None:
+    """
+    Launches the Textual popup and hands the chosen command to the shell after it exits.
+
+    Args:
+        models (dict): The model names and identifiers to offer.
+        use_cache (bool): Whether cached and remembered commands may be reused.
+        output_fd (int): If set, the command is written to this file descriptor for
+            a shell widget to insert, instead of being pasted into the terminal.
+    """
+    with metrics.span("import_tui"):
+        from tAI.App.app import TAI
+
     
     # Get all configs
     default_model = config_manager.get_default_model()
     prompt = config_manager.get_prompt()
     fullscreen = config_manager.get_set_full_screen()
     openrouter_all = config_manager.get_set_openrouter_for_all()
+    stream_response = config_manager.get_set_stream_response()
+    speculative = config_manager.get_set_speculative()
+    instant_answers = config_manager.get_set_instant_answers()
 
     app = TAI(
         models=models,
@@ -68,10 +145,29 @@ def tAI():
         prompt=prompt,
         fullscreen=fullscreen,
         openrouter_all=openrouter_all,
+        use_cache=use_cache,
+        stream_response=stream_response,
+        speculative=speculative,
+        instant_answers=instant_answers,
+        # The shell widget inserts the command itself, so there is no paste to wait for.
+        exit_delay=0 if output_fd is not None else 1,
     )
     result = app.run(inline=not fullscreen)
     if result is not None:
-        automate.paste_command_to_terminal(result)
+        started = time.perf_counter()
+        if output_fd is not None:
+            with os.fdopen(output_fd, "w") as output:
+                output.write(result)
+            backend = "shell"
+        else:
+            from tAI.KeyAutomation import Automate
+
+            automate = Automate(config_manager.get_paste_backend())
+            automate.paste_command_to_terminal(result)
+            backend = automate.last_backend
+            metrics.record("paste_settle", automate.last_settle, backend=backend)
+        metrics.record("paste", time.perf_counter() - started, backend=backend)
+    metrics.flush()
 
 if __name__ == "__main__":
-    tAI()
\ No newline at end of file
+    tAI()
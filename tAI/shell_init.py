@@ -0,0 +1,77 @@
+"""
+This module generates the shell integration printed by `tai --shell-init SHELL`.
+
+The script defines a line editor widget bound to Ctrl+X Ctrl+T, a sequence no
+shell binds by default, so Ctrl+K keeps killing to the end of the line. The
+script header says how to move the widget to another key. The widget runs the
+TUI on the terminal with `--output-fd 3`, so the chosen command comes back over
+a pipe and is inserted at the cursor through the shell's own editing API
+(READLINE_LINE in bash, LBUFFER in zsh, `commandline` in fish). No keystrokes
+are simulated, which works in any terminal, over SSH and in tmux, without an X
+server or input device.
+"""
+
+_KEY_NOTE = (
+    "# Bound to Ctrl+X Ctrl+T, a sequence no shell binds by default, so Ctrl+K keeps killing the line.\n"
+    "# To use another key, bind _tai_widget yourself after the line above, e.g. for Alt+K:"
+)
+
+# The TUI draws on the terminal; only file descriptor 3 is captured.
+_RUN = "tai --output-fd 3 3>&1 1>/dev/tty 2>/dev/tty </dev/tty"
+
+BASH = rf"""# tAI shell integration. Add to ~/.bashrc: eval "$(tai --shell-init bash)"
+{_KEY_NOTE}
+# bind -x '"\ek": _tai_widget'
+_tai_widget() {{
+    local command
+    command=$({_RUN})
+    if [[ -n $command ]]; then
+        READLINE_LINE="${{READLINE_LINE:0:READLINE_POINT}}${{command}}${{READLINE_LINE:READLINE_POINT}}"
+        READLINE_POINT=$((READLINE_POINT + ${{#command}}))
+    fi
+}}
+bind -x '"\C-x\C-t": _tai_widget'
+"""
+
+ZSH = rf"""# tAI shell integration. Add to ~/.zshrc: eval "$(tai --shell-init zsh)"
+{_KEY_NOTE}
+# bindkey '^[k' _tai_widget
+_tai_widget() {{
+    local command
+    command=$({_RUN})
+    if [[ -n $command ]]; then
+        LBUFFER+=$command
+    fi
+    zle reset-prompt
+}}
+zle -N _tai_widget
+bindkey '^X^T' _tai_widget
+"""
+
+FISH = rf"""# tAI shell integration. Add to ~/.config/fish/config.fish: tai --shell-init fish | source
+{_KEY_NOTE}
+# bind \ek _tai_widget
+function _tai_widget
+    set -l command ({_RUN} | string collect)
+    if test -n "$command"
+        commandline -i -- $command
+    end
+    commandline -f repaint
+end
+bind \cx\ct _tai_widget
+bind -M insert \cx\ct _tai_widget 2>/dev/null
+"""
+
+SCRIPTS = {"bash": BASH, "zsh": ZSH, "fish": FISH}
+
+
+def shell_init(shell: str) -> str:
+    """
+    Returns the integration script for a shell.
+
+    Args:
+        shell (str): "bash", "zsh" or "fish".
+    """
+    if shell not in SCRIPTS:
+        raise Exception(f"Unsupported shell: {shell}")
+    return SCRIPTS[shell]
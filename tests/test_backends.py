@@ -0,0 +1,109 @@
+import asyncio
+import json
+
+import pytest
+
+from benchmarks.mock_server import MockConfig, MockServer
+from tAI.LLM.backends import HttpBackend, ProviderError
+from tAI.LLM.decoding import rejects_structured_output
+from tAI.LLM.health import RATE_LIMITED, TIMEOUT, classify, is_retryable
+from tAI.LLM.LLM_Integration import COMMAND_FORMAT
+
+COMMAND = MockConfig.command
+REPLY = json.dumps({"command": COMMAND})
+backend = HttpBackend()
+
+
+@pytest.fixture
+def server():
+    with MockServer() as server:
+        yield server
+
+
+def request(server, **extra):
+    return {
+        "messages": [{"role": "system", "content": "prompt"}, {"role": "user", "content": "find big files"}],
+        "api_key": "sk-test",
+        "api_base": server.base_url,
+        "timeout": 5,
+        **extra,
+    }
+
+
+def read_stream(stream):
+    try:
+        return "".join(stream)
+    finally:
+        stream.close()
+
+
+async def aread_stream(stream):
+    try:
+        return "".join([delta async for delta in stream])
+    finally:
+        await stream.aclose()
+
+
+@pytest.mark.parametrize("model", ["openai/gpt-4o-mini", "anthropic/claude-3-5-haiku"])
+def test_complete(server, model):
+    assert json.loads(backend.complete(model, request(server, response_format=COMMAND_FORMAT))) == {"command": COMMAND}
+    assert json.loads(asyncio.run(backend.acomplete(model, request(server, response_format=COMMAND_FORMAT)))) == {"command": COMMAND}
+
+
+@pytest.mark.parametrize("model", ["openai/gpt-4o-mini", "anthropic/claude-3-5-haiku"])
+def test_stream(server, model):
+    # Anthropic streams the forced `command` tool call as partial_json deltas.
+    assert json.loads(read_stream(backend.stream(model, request(server, response_format=COMMAND_FORMAT)))) == {"command": COMMAND}
+
+    async def astream():
+        return await aread_stream(await backend.astream(model, request(server, response_format=COMMAND_FORMAT)))
+
+    assert json.loads(asyncio.run(astream())) == {"command": COMMAND}
+
+
+def test_anthropic_without_schema_returns_text(server):
+    assert backend.complete("anthropic/claude-3-5-haiku", request(server)) == REPLY
+
+
+def test_rate_limit_is_a_retryable_provider_error(server):
+    server.config.error_rate = 1.0
+    with pytest.raises(ProviderError) as raised:
+        backend.complete("openai/gpt-4o-mini", request(server))
+    assert raised.value.status_code == 429
+    assert classify(raised.value) == RATE_LIMITED
+    assert is_retryable(raised.value)
+
+    with pytest.raises(ProviderError) as raised:
+        asyncio.run(backend.astream("anthropic/claude-3-5-haiku", request(server)))
+    assert classify(raised.value) == RATE_LIMITED
+
+
+def test_server_error_is_retryable(server):
+    server.config.error_rate = 1.0
+    server.config.error_status = 503
+    with pytest.raises(ProviderError) as raised:
+        backend.stream("openai/gpt-4o-mini", request(server))
+    assert raised.value.status_code == 503
+    assert is_retryable(raised.value)
+
+
+def test_response_format_rejection(server):
+    server.config.reject_response_format = True
+    with pytest.raises(ProviderError) as raised:
+        backend.complete("openai/gpt-4o-mini", request(server, response_format=COMMAND_FORMAT))
+    assert raised.value.status_code == 400
+    assert rejects_structured_output(raised.value)
+    assert not is_retryable(raised.value)
+    # Asked again without the schema, as llm._completion does.
+    assert backend.complete("openai/gpt-4o-mini", request(server)) == REPLY
+
+
+def test_timeout_is_raised_as_timeout_error(server):
+    server.config.latency = 1.0
+    with pytest.raises(TimeoutError) as raised:
+        backend.complete("openai/gpt-4o-mini", request(server, timeout=0.1))
+    assert classify(raised.value) == TIMEOUT
+    assert is_retryable(raised.value)
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(backend.acomplete("openai/gpt-4o-mini", request(server, timeout=0.1)))
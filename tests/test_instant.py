@@ -0,0 +1,13 @@
+from tAI.LLM.instant import BUNDLED_CORPUS, InstantAnswers
+
+engine = InstantAnswers.load([BUNDLED_CORPUS])
+
+
+def test_slot_is_filled():
+    found = engine.match("find files larger than 100MB")
+    assert found.command == "find . -type f -size +100M -print0 | xargs -0 ls -lh"
+
+
+def test_unmatched_scope_falls_through_to_the_model():
+    # "/tmp" has no slot in the intent; answering would search "." instead.
+    assert engine.match("find files larger than 100MB in /tmp") is None
@@ -0,0 +1,23 @@
+from tAI.Utils import metrics
+
+
+def test_percentile_is_nearest_rank():
+    values = list(range(1, 11))
+    assert metrics.percentile(values, 50) == 5
+    assert metrics.percentile(values, 95) == 10
+    assert metrics.percentile(values, 10) == 1
+    assert metrics.percentile([7.0], 99) == 7.0
+
+
+def test_load_skips_malformed_lines(tmp_path):
+    path = tmp_path / "metrics.jsonl"
+    path.write_text(
+        '{"phase": "network_total", "ms": 12.5}\n'
+        "not json\n"
+        '{"phase": "render"}\n'
+        '{"ms": 3}\n'
+        "[1, 2]\n"
+    )
+    entries = metrics.load(str(path))
+    assert entries == [{"phase": "network_total", "ms": 12.5}]
+    assert metrics.summarize(entries)["phases"]["network_total"]["p50"] == 12.5
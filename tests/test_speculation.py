@@ -0,0 +1,12 @@
+from tAI.App.app import is_stable_extension
+
+
+def test_trailing_filler_keeps_the_request():
+    assert is_stable_extension("list open ports", "list open ports")
+    assert is_stable_extension("list open ports", "list open ports please")
+
+
+def test_added_content_changes_the_request():
+    assert not is_stable_extension("list open ports", "list open ports on eth0")
+    assert not is_stable_extension("list open ports please", "list open ports")
+    assert not is_stable_extension("find files", "find big files")
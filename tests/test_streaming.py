@@ -0,0 +1,21 @@
+from tAI.LLM.decoding import JSON
+from tAI.LLM.streaming import CommandStreamParser
+
+
+def feed(*chunks):
+    parser = CommandStreamParser()
+    for chunk in chunks:
+        parser.feed(chunk)
+    return parser
+
+
+def test_escape_split_across_chunks():
+    parser = feed('{"command": "echo caf\\u00', 'e9"}')
+    assert parser.value == "echo café"
+    assert parser.result().method == JSON
+
+
+def test_malformed_escape_is_kept_literally():
+    parser = feed('{"command": "echo \\uZZ', 'ZZ done"}')
+    assert parser.complete
+    assert parser.result().command == "echo \\uZZZZ done"